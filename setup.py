@@ -5,4 +5,8 @@ import setuptools
 
 setuptools.setup(name='scippwidgets',
                  packages=setuptools.find_packages('src'),
-                 package_dir={"": "src"})
+                 package_dir={"": "src"},
+                 extras_require={
+                     "plot": ["plopp"],
+                     "testing": ["ipywidgets>=8", "comm"]
+                 })
@@ -0,0 +1,272 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from .debounce import get_kernel_loop
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+import io
+import logging
+import sys
+import threading
+import time
+
+
+_lock = threading.Lock()
+_captures = {}  # thread id -> stack of captures running on it
+_streams = None
+_handler = None
+
+
+def _capture_for(thread_id):
+    stack = _captures.get(thread_id)
+    return stack[-1] if stack else None
+
+
+def _log_capture_for(record):
+    """
+    Returns the capture taking record, if any.
+    """
+    capture = _capture_for(record.thread)
+    if capture is None or not capture.capture_logging:
+        return None
+    if record.levelno < capture.log_level:
+        return None
+    return capture
+
+
+class _ThreadRoutedStream(io.TextIOBase):
+    """
+    Stand-in for sys.stdout/sys.stderr sending writes from capturing
+    threads to their capture and everything else to the original stream.
+    """
+    def __init__(self, original):
+        self._original = original
+
+    def write(self, text):
+        capture = _capture_for(threading.get_ident())
+        if capture is not None:
+            capture.write(text)
+        else:
+            self._original.write(text)
+        return len(text)
+
+    def flush(self):
+        if _capture_for(threading.get_ident()) is None:
+            self._original.flush()
+
+
+class _RoutingHandler(logging.Handler):
+    """
+    Root logger handler sending records from capturing threads
+    to their capture.
+    """
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+
+    def emit(self, record):
+        capture = _log_capture_for(record)
+        if capture is not None:
+            capture.write(self.format(record) + '\n')
+
+
+def _not_captured(record):
+    """
+    Filter added to the other root logger handlers, so records
+    which are captured are not also emitted by them.
+    """
+    return _log_capture_for(record) is None
+
+
+def _register(capture, thread_id):
+    """
+    Starts routing output of thread_id to capture, installing the
+    stream and logging routers if no capture is active yet.
+    """
+    global _streams, _handler
+    with _lock:
+        if _streams is None:
+            _streams = sys.stdout, sys.stderr
+            sys.stdout = _ThreadRoutedStream(sys.stdout)
+            sys.stderr = _ThreadRoutedStream(sys.stderr)
+            _handler = _RoutingHandler()
+            logging.getLogger().addHandler(_handler)
+        for handler in logging.getLogger().handlers:
+            if handler is not _handler and _not_captured not in handler.filters:
+                handler.addFilter(_not_captured)
+        _captures.setdefault(thread_id, []).append(capture)
+
+
+def _unregister(capture, thread_id):
+    """
+    Stops routing output of thread_id to capture, removing the
+    routers once no capture remains.
+    """
+    global _streams, _handler
+    with _lock:
+        stack = _captures[thread_id]
+        stack.remove(capture)
+        if not stack:
+            del _captures[thread_id]
+        if _captures:
+            return
+        stdout, stderr = _streams
+        if isinstance(sys.stdout, _ThreadRoutedStream):
+            sys.stdout = stdout
+        if isinstance(sys.stderr, _ThreadRoutedStream):
+            sys.stderr = stderr
+        root = logging.getLogger()
+        root.removeHandler(_handler)
+        for handler in root.handlers:
+            handler.removeFilter(_not_captured)
+        _streams = None
+        _handler = None
+
+
+class _Capture():
+    """
+    State of a single BufferedOutput.capture, so overlapping
+    captures with the same BufferedOutput do not interfere.
+    """
+    def __init__(self, settings, output_widget):
+        self.capture_logging = settings.capture_logging
+        self.log_level = settings.log_level
+        self._flush_interval = settings.flush_interval
+        self._loop = settings._loop
+        self._lock = threading.Lock()
+        self._lines = deque(maxlen=settings.max_lines)
+        self._partial = ''
+        self._output_widget = output_widget
+        self._file = None
+        if settings.log_file is not None:
+            self._file = open(settings.log_file, 'a')
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def text(self):
+        with self._lock:
+            return ''.join(self._lines) + self._partial
+
+    def write(self, text):
+        with self._lock:
+            if self._file is not None:
+                self._file.write(text)
+            lines = (self._partial + text).splitlines(keepends=True)
+            if lines and not lines[-1].endswith('\n'):
+                self._partial = lines.pop()
+            else:
+                self._partial = ''
+            self._lines.extend(lines)
+            wait = self._flush_interval - (time.monotonic() - self._last_flush)
+            if wait > 0 and self._timer is None:
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if wait <= 0:
+            self.flush()
+
+    def flush(self):
+        """
+        Shows the buffered text in the output widget, on the kernel
+        thread when called from another thread.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._last_flush = time.monotonic()
+        outputs = ({'output_type': 'stream', 'name': 'stdout', 'text': self.text}, )
+        if self._loop is None or threading.current_thread() is threading.main_thread():
+            self._output_widget.outputs = outputs
+        else:
+            self._loop.call_soon_threadsafe(setattr, self._output_widget, 'outputs',
+                                            outputs)
+
+    @contextmanager
+    def attach(self):
+        """
+        Context manager capturing output of the calling thread as
+        well, for functions run on other threads, e.g. by an executor.
+        """
+        thread_id = threading.get_ident()
+        _register(self, thread_id)
+        try:
+            yield self
+        finally:
+            _unregister(self, thread_id)
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BufferedOutput():
+    """
+    Captures stdout, stderr and log records of a wrapped function
+    and shows them in an output widget at a bounded rate, rather
+    than sending one frontend message per line. Text written since
+    the last update is shown at most flush_interval later, even if
+    nothing else is written.
+    Only the most recent lines are kept for display, the full
+    text can be written to a log file.
+
+    Captures may overlap, for example in several background widgets
+    or in successive runs of one. Each capture keeps its own lines.
+    Output is routed by thread, and sys.stdout, sys.stderr and the
+    root logger are restored once the last capture ends.
+    """
+    def __init__(self,
+                 max_lines: int = 1000,
+                 flush_interval: float = 0.5,
+                 log_file: Optional[str] = None,
+                 capture_logging: bool = True,
+                 log_level: int = logging.INFO):
+        """
+        :param max_lines: Number of recent lines to display.
+        :param flush_interval: Minimum time in seconds between
+            updates of the output widget.
+        :param log_file: If given, all captured text is appended
+            to this file.
+        :param capture_logging: If True log records emitted while
+            capturing are captured as well, instead of being emitted
+            by the other root logger handlers.
+        :param log_level: Lowest level of log records to capture.
+            Records are only created for levels the logger is enabled
+            for, and the root logger defaults to WARNING, so capturing
+            INFO records needs e.g. logging.getLogger().setLevel('INFO').
+        """
+        self.max_lines = max_lines
+        self.flush_interval = flush_interval
+        self.log_file = log_file
+        self.capture_logging = capture_logging
+        self.log_level = log_level
+        self._loop = get_kernel_loop()
+        self._last = None
+
+    @contextmanager
+    def capture(self, output_widget):
+        """
+        Context manager capturing output of the calling thread
+        into output_widget.
+        """
+        thread_id = threading.get_ident()
+        capture = _Capture(self, output_widget)
+        self._last = capture
+        _register(capture, thread_id)
+        try:
+            yield capture
+        finally:
+            _unregister(capture, thread_id)
+            capture.close()
+
+    @property
+    def text(self):
+        """
+        The text buffered by the most recently started capture.
+        """
+        return '' if self._last is None else self._last.text
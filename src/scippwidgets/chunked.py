@@ -0,0 +1,259 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Union
+import os
+import tempfile
+import threading
+import warnings
+
+
+class HDF5Writer():
+    """
+    Writes chunks of a result to a dataset in an HDF5 file,
+    growing it along the chunked dimension, so the full result
+    never has to be held in memory.
+    Coords are written next to the dataset, variances to a dataset
+    named <path>_variances and masks to a masks group, in the layout
+    read by scippwidgets.lazy.LazyDataArray.
+
+    Each run writes through its own session to a temporary file,
+    which replaces filename only when the run finishes and no later
+    run has started, so a superseded run cannot corrupt the result
+    of a newer one. Lazy proxies returned by earlier runs read
+    filename on access, so they see the newest result once it is
+    replaced; use a separate writer to keep results side by side.
+    """
+    def __init__(self, filename: str, path: str = 'data'):
+        """
+        :param filename: File to write to. It is overwritten.
+        :param path: Path of the dataset within the file.
+        """
+        self.filename = filename
+        self.path = path
+        self._lock = threading.Lock()
+        self._latest = None
+
+    def start(self, dim: str) -> '_HDF5Session':
+        """
+        Starts a run writing chunks along dim, superseding any
+        earlier run, and returns the session to write it with.
+        """
+        session = _HDF5Session(self, dim)
+        with self._lock:
+            self._latest = session
+        return session
+
+    def _replace(self, session, temporary):
+        with self._lock:
+            if session is not self._latest:
+                return False
+            os.replace(temporary, self.filename)
+            return True
+
+
+class _HDF5Session():
+    """
+    A single run of an HDF5Writer, owning its own file handle.
+    """
+    def __init__(self, writer, dim):
+        import h5py
+        self.filename = writer.filename
+        self.path = writer.path
+        self._writer = writer
+        self._dim = dim
+        directory = os.path.dirname(os.path.abspath(writer.filename))
+        descriptor, self._temporary = tempfile.mkstemp(suffix='.h5', dir=directory)
+        os.close(descriptor)
+        self._file = h5py.File(self._temporary, 'w')
+
+    def write(self, chunk):
+        """
+        Appends a data array or variable along the chunked dimension.
+        Coords and masks not depending on it are written once.
+        """
+        if self._dim not in chunk.dims:
+            raise ValueError(f'Results must keep dimension {self._dim} to be '
+                             f'written in chunks, got dims {chunk.dims}')
+        first = self.path not in self._file
+        self._append(self.path, chunk.values, chunk.dims)
+        if chunk.variances is not None:
+            self._append(f'{self.path}_variances', chunk.variances, chunk.dims)
+        dataset = self._file[self.path]
+        if first:
+            dataset.parent.attrs['axes'] = list(chunk.dims)
+            dataset.attrs['units'] = str(chunk.unit)
+        group = dataset.parent
+        for name, coord in getattr(chunk, 'coords', {}).items():
+            edges = self._dim in coord.dims and chunk.coords.is_edges(name, self._dim)
+            self._write_meta(group, name, coord, first, edges)
+        for name, mask in getattr(chunk, 'masks', {}).items():
+            self._write_meta(group.require_group('masks'), name, mask, first, False)
+
+    def _write_meta(self, group, name, variable, first, edges):
+        """
+        Writes a coord or mask, skipping the first bin edge of all but
+        the first chunk as it is the last edge of the previous one.
+        """
+        import numpy as np
+        path = f'{group.name}/{name}'
+        if not first and (self._dim not in variable.dims or path not in self._file):
+            return
+        values = np.asarray(variable.values)
+        if values.dtype.kind not in 'biuf' or values.ndim != len(variable.dims):
+            warnings.warn(f'{name} of dtype {variable.dtype} is not written to '
+                          f'{self.filename}')
+            return
+        if first and variable.variances is not None:
+            warnings.warn(f'Variances of {name} are not written to {self.filename}')
+        if edges and not first:
+            selection = [slice(None)] * values.ndim
+            selection[variable.dims.index(self._dim)] = slice(1, None)
+            values = values[tuple(selection)]
+        self._append(path, values, variable.dims)
+        if first:
+            self._file[path].attrs['axes'] = list(variable.dims)
+            if variable.unit is not None:
+                self._file[path].attrs['units'] = str(variable.unit)
+
+    def _append(self, path, values, dims):
+        if path not in self._file:
+            if self._dim not in dims:
+                self._file.create_dataset(path, data=values)
+                return
+            maxshape = list(values.shape)
+            maxshape[dims.index(self._dim)] = None
+            self._file.create_dataset(path,
+                                      data=values,
+                                      maxshape=tuple(maxshape),
+                                      chunks=True)
+            return
+        axis = dims.index(self._dim)
+        dataset = self._file[path]
+        start = dataset.shape[axis]
+        dataset.resize(start + values.shape[axis], axis=axis)
+        selection = [slice(None)] * values.ndim
+        selection[axis] = slice(start, None)
+        dataset[tuple(selection)] = values
+
+    def close(self):
+        """
+        Closes the file, if it is open, and removes it unless the
+        session was finished.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._temporary is not None:
+            os.remove(self._temporary)
+            self._temporary = None
+
+    def finish(self):
+        """
+        Closes the file, moves it to filename and returns a lazy
+        proxy for the result.
+        """
+        from .lazy import LazyDataArray
+        self._file.close()
+        self._file = None
+        if not self._writer._replace(self, self._temporary):
+            raise RuntimeError(f'A later run has started writing to {self.filename}')
+        self._temporary = None
+        return LazyDataArray(self.filename, self.path)
+
+
+class Chunking():
+    """
+    Describes how to stream one argument of a wrapped function
+    through it in slices along a dimension, and how to combine
+    the results of the slices.
+    """
+    def __init__(self,
+                 arg_name: str,
+                 dim: str,
+                 chunk_size: int,
+                 combine: Union[str, Callable[[Any, Any], Any]] = 'concat',
+                 writer: Optional[HDF5Writer] = None,
+                 max_in_flight: int = 2):
+        """
+        :param arg_name: Name of the argument to slice. It may be any
+            object supporting obj.sizes and obj[dim, slice], including
+            a lazy proxy, so slices are only read as they are needed.
+        :param dim: Dimension to slice along.
+        :param chunk_size: Length of each slice along dim.
+        :param combine: 'concat' to concatenate results along dim, or
+            a callable (accumulated, chunk_result) -> accumulated
+            reducing results as they arrive.
+        :param writer: If given, results are written to it instead of
+            being combined, and the result is a lazy proxy for the
+            written file. Results must keep dim to be written.
+        :param max_in_flight: Maximum number of chunks submitted to
+            the executor and not yet combined.
+        """
+        if chunk_size <= 0:
+            raise ValueError(f'chunk_size must be positive, got {chunk_size}')
+        if max_in_flight <= 0:
+            raise ValueError(f'max_in_flight must be positive, got {max_in_flight}')
+        if combine != 'concat' and not callable(combine):
+            raise ValueError(f"combine must be 'concat' or a callable, got {combine!r}")
+        self.arg_name = arg_name
+        self.dim = dim
+        self.chunk_size = chunk_size
+        self.combine = combine
+        self.writer = writer
+        self.max_in_flight = max_in_flight
+
+    def run(self, func: Callable, kwargs: Dict[str, Any], executor):
+        """
+        Calls func once per slice, through executor,
+        and returns the combined result.
+        """
+        if self.arg_name not in kwargs:
+            raise ValueError(f'Chunked argument {self.arg_name} was not given')
+        data = kwargs[self.arg_name]
+        if self.dim not in data.sizes:
+            raise ValueError(f'Dimension {self.dim} does not exist in {self.arg_name}')
+        size = data.sizes[self.dim]
+        if size == 0:
+            raise ValueError(f'{self.arg_name} has no elements along {self.dim}')
+        results = []
+        accumulated = None
+        pending = deque()
+        session = None
+
+        def consume(result):
+            nonlocal accumulated
+            if session is not None:
+                session.write(result)
+            elif self.combine == 'concat':
+                results.append(result)
+            elif accumulated is None:
+                accumulated = result
+            else:
+                accumulated = self.combine(accumulated, result)
+
+        if self.writer is not None:
+            session = self.writer.start(self.dim)
+        try:
+            for start in range(0, size, self.chunk_size):
+                chunk = data[self.dim, start:min(start + self.chunk_size, size)]
+                chunk_kwargs = {**kwargs, self.arg_name: chunk}
+                pending.append(executor.submit(func, **chunk_kwargs))
+                if len(pending) >= self.max_in_flight:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+            if session is not None:
+                return session.finish()
+        finally:
+            for future in pending:
+                future.cancel()
+            if session is not None:
+                session.close()
+
+        if self.combine == 'concat':
+            import scipp as sc
+            return sc.concat(results, self.dim)
+        return accumulated
@@ -0,0 +1,64 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+import asyncio
+from typing import Callable
+
+
+def get_kernel_loop():
+    """
+    Returns the running event loop of the kernel, or None
+    when called outside of one, for example from plain python.
+    """
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class Debouncer():
+    """
+    Delays calls to a function until no new call has been requested
+    for a given interval. Requests made in the meantime are coalesced,
+    only the latest one is run.
+
+    The delayed call is scheduled on the kernel event loop so it runs
+    on the same thread as widget callbacks. Outside an event loop the
+    function is called immediately.
+    """
+    def __init__(self, func: Callable, delay: float = 0.3):
+        """
+        :param func: Function to call.
+        :param delay: Quiet interval in seconds before func is called.
+        """
+        self.func = func
+        self.delay = delay
+        self._handle = None
+
+    def __call__(self, *args, **kwargs):
+        self.cancel()
+        loop = get_kernel_loop()
+        if loop is None or self.delay <= 0:
+            self.func(*args, **kwargs)
+            return
+        self._handle = loop.call_later(self.delay, self._fire, args, kwargs)
+
+    def _fire(self, args, kwargs):
+        self._handle = None
+        self.func(*args, **kwargs)
+
+    @property
+    def pending(self):
+        """
+        True if a call is waiting for the quiet interval to elapse.
+        """
+        return self._handle is not None
+
+    def cancel(self):
+        """
+        Drops the pending call, if any.
+        """
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from abc import ABC, abstractmethod
+from concurrent import futures
+from typing import Callable, Optional
+
+
+class IExecutor(ABC):
+    """
+    Interface for backends executing the functions wrapped by widgets.
+    in_process is False for backends calling functions in other
+    processes, whose output cannot be captured by the widget.
+    """
+    in_process = True
+
+    @abstractmethod
+    def submit(self, func: Callable, *args, **kwargs):
+        """
+        Starts func(*args, **kwargs) and returns a future-like
+        object with result() and add_done_callback methods.
+        """
+        pass
+
+    def run(self, func: Callable, *args, **kwargs):
+        """
+        Calls func(*args, **kwargs) and returns its result,
+        or a handle to it for backends which defer gathering.
+        """
+        return self.submit(func, *args, **kwargs).result()
+
+    def shutdown(self):
+        """
+        Releases any workers held by this executor.
+        """
+        pass
+
+
+class InProcessExecutor(IExecutor):
+    """
+    Calls functions directly in the calling thread.
+    """
+    def submit(self, func, *args, **kwargs):
+        future = futures.Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+class ThreadPoolExecutor(IExecutor):
+    """
+    Runs functions on a pool of threads in the kernel process.
+    Suits functions which release the GIL, as most scipp operations do.
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        self._pool = futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, func, *args, **kwargs):
+        return self._pool.submit(func, *args, **kwargs)
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+class ProcessPoolExecutor(IExecutor):
+    """
+    Runs functions on a pool of worker processes. The function,
+    its arguments and its result must be picklable, so functions
+    defined in the notebook itself may not work.
+    """
+    in_process = False
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._pool = futures.ProcessPoolExecutor(max_workers=max_workers)
+
+    def submit(self, func, *args, **kwargs):
+        return self._pool.submit(func, *args, **kwargs)
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+class DaskExecutor(IExecutor):
+    """
+    Runs functions on a dask.distributed cluster, for example
+    through a client connected to a LocalCluster.
+    """
+    in_process = False
+
+    def __init__(self, client, gather: bool = True):
+        """
+        :param client: A dask.distributed Client.
+        :param gather: If False, run returns the dask future rather
+            than its result, leaving the result on the cluster until
+            future.result() is called.
+        """
+        self.client = client
+        self.gather = gather
+
+    def submit(self, func, *args, **kwargs):
+        return self.client.submit(func, *args, pure=False, **kwargs)
+
+    def run(self, func, *args, **kwargs):
+        future = self.submit(func, *args, **kwargs)
+        if self.gather:
+            return future.result()
+        return future
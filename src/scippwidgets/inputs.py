@@ -4,8 +4,10 @@
 # @author Matthew Andrew
 import ipywidgets as widgets
 from scippwidgets.validators import ScippObjectValidator, AttrValidator
+from scippwidgets.debounce import Debouncer
 from typing import Any, Sequence, Callable
 from abc import ABC, abstractmethod
+from functools import lru_cache
 import os
 
 
@@ -16,6 +18,81 @@ def _wrapped_eval(input, scope):
         raise ValueError(f"Object of name '{input}' not found in scope.")
 
 
+@lru_cache(maxsize=256)
+def _names_in(expression):
+    """
+    Returns the names an expression looks up when evaluated.
+    """
+    try:
+        return compile(expression, '<input>', 'eval').co_names
+    except SyntaxError:
+        return ()
+
+
+def _is_plain(value):
+    return value is None or type(value) in (str, int, float, bool)
+
+
+def _same_key(first, second):
+    """
+    Compares cache keys. Plain values compare by equality,
+    anything else, such as objects from the scope, by identity.
+    """
+    return len(first) == len(second) and all(
+        a is b or (_is_plain(a) and a == b) for a, b in zip(first, second))
+
+
+class ValidationCache():
+    """
+    Remembers the outcome of the last successful validation,
+    together with a key describing what it depended on.
+
+    Keys of plain values, such as the input text or a file's
+    modification time, fully describe what was validated. Other key
+    items, such as scope objects, are compared by identity, which
+    misses changes made to them in place. A value cached for such a
+    key is only reused if trust_objects is True.
+    """
+    def __init__(self, trust_objects: bool = False):
+        self.trust_objects = trust_objects
+        self._key = None
+        self._value = None
+
+    def get(self, key, validate: Callable[[], Any]):
+        """
+        Returns the cached value if it can be reused for key.
+        Otherwise calls validate, caching its result or clearing
+        the cache if it raises.
+        """
+        if not self._reusable(key):
+            self.clear()
+            value = validate()
+            self._key, self._value = key, value
+        return self._value
+
+    def _reusable(self, key):
+        if self._key is None or not _same_key(self._key, key):
+            return False
+        return self.trust_objects or all(_is_plain(item) for item in key)
+
+    def clear(self):
+        self._key = None
+        self._value = None
+
+
+def _show_validity(widget, error):
+    """
+    Marks widget as invalid, with the error as tooltip,
+    or clears the marking if error is None.
+    """
+    widget.layout.border = '' if error is None else '1px solid red'
+    tooltip = '' if error is None else str(error)
+    if widget.has_trait('tooltip'):
+        widget.tooltip = tooltip
+    else:
+        widget.description_tooltip = tooltip
+
+
 class IInput(ABC):
     """
     Interfaces detailing which methods and properties an
@@ -31,44 +108,111 @@ class IInput(ABC):
     def function_arguments(self):
         pass
 
+    def snapshot_state(self):
+        """
+        Returns the user-entered state of the input
+        as a JSON compatible value.
+        """
+        return None
+
+    def restore_state(self, state):
+        """
+        Restores state returned by snapshot_state.
+        """
+        pass
+
+    def invalidate(self):
+        """
+        Discards cached validation results, for example after
+        changing a scope object in place.
+        """
+        pass
+
 
 class SingleInput(IInput):
     def __init__(self,
                  func_arg_name: str,
                  widget_type=widgets.Combobox,
                  validator: Callable[[str], Any] = lambda input: input,
+                 trust_cache: bool = False,
                  **kwargs):
         """
         :param function_arg_name: Name of function argument this
             input corresponds to.
         :param widget_type: Type of widget to construct for this input.
         :param validator: Validator function.
+        :param trust_cache: If True a value validated on change is also
+            reused on click while the objects it depends on are the same
+            objects, so changes made to them in place are not seen
+            until invalidate is called. Values depending only on the
+            input text are always reused.
         :param kwargs: kwargs to pass to widget constructor.
         :type widget_type:  ipywidget
         """
         self._name = func_arg_name
-        self._widget = widget_type(**kwargs)
+        self._widget_type = widget_type
+        self._widget_kwargs = kwargs
+        self._widget = None
         self._validator = validator
-        if 'placeholder' not in kwargs:
-            self._widget.placeholder = func_arg_name
+        self._cache = ValidationCache(trust_objects=trust_cache)
+        self._eager_validation = Debouncer(self._validate_eagerly, 0.1)
 
     @property
     def function_arguments(self):
         """
         Return function arguments as dict of arg_name: arg_value
         """
-        if self.widget.value:
-            return {self._name: self._validator(self.widget.value)}
+        if self._widget is not None and self._widget.value:
+            return {self._name: self._validated(self._widget.value)}
         else:
             return {}
 
     @property
     def widget(self):
         """
-        Returns constructed used-input widget
+        Returns constructed used-input widget.
+        The widget is created on first access.
         """
+        if self._widget is None:
+            self._widget = self._widget_type(**self._widget_kwargs)
+            if 'placeholder' not in self._widget_kwargs:
+                self._widget.placeholder = self._name
+            self._widget.observe(self._eager_validation, names='value')
         return self._widget
 
+    def snapshot_state(self):
+        return self.widget.value
+
+    def restore_state(self, state):
+        self.widget.value = state
+
+    def _cache_key(self, value):
+        """
+        Returns everything the validated value depends on.
+        """
+        return (value, )
+
+    def invalidate(self):
+        self._cache.clear()
+
+    def _validated(self, value):
+        return self._cache.get(self._cache_key(value), lambda: self._validator(value))
+
+    def _validate_eagerly(self, change):
+        """
+        Validates a changed value ahead of it being used,
+        marking the widget if it is invalid.
+        """
+        if not change['new']:
+            _show_validity(self._widget, None)
+            return
+        try:
+            self._validated(change['new'])
+        except Exception as e:
+            _show_validity(self._widget, e)
+        else:
+            _show_validity(self._widget, None)
+
 
 class TextInput(SingleInput):
     """
@@ -79,11 +223,7 @@ class TextInput(SingleInput):
                  function_arg_name: str,
                  validator: Callable[[str], str] = lambda input: input,
                  **kwargs):
-        self._name = function_arg_name
-        self._widget = widgets.Combobox(**kwargs)
-        self._validator = validator
-        if 'placeholder' not in kwargs:
-            self._widget.placeholder = function_arg_name
+        super().__init__(function_arg_name, widgets.Combobox, validator, **kwargs)
 
 
 class Input(SingleInput):
@@ -94,21 +234,33 @@ class Input(SingleInput):
     def __init__(self,
                  function_arg_name: str,
                  validator: Callable[[Any], Any] = lambda input: input,
+                 trust_cache: bool = False,
                  **kwargs):
         """
         :param function_arg_name: Name of function argument this
             input corresponds to.
         :param widget_type: Type of widget to construct for this input.
         :param validator: Validator function.
+        :param trust_cache: If True the evaluated value is reused on
+            click until the expression changes or a name in it is bound
+            to another object. Call invalidate after changing an object
+            in place.
         :param kwargs: kwargs to pass to widget constructor.
         :type widget_type:  ipywidget
         """
-        self._name = function_arg_name
-        self._widget = widgets.Combobox(**kwargs)
+        super().__init__(function_arg_name,
+                         widgets.Combobox,
+                         lambda input: validator(_wrapped_eval(input, self.scope)),
+                         trust_cache=trust_cache,
+                         **kwargs)
         self.scope = get_notebook_global_scope()
-        self._validator = lambda input: validator(_wrapped_eval(input, self.scope))
-        if 'placeholder' not in kwargs:
-            self._widget.placeholder = function_arg_name
+
+    def _cache_key(self, value):
+        """
+        The evaluated value also depends on the scope
+        objects the expression refers to.
+        """
+        return (value, ) + tuple(self.scope.get(name) for name in _names_in(value))
 
 
 scipp_object_validator = ScippObjectValidator()
@@ -123,47 +275,77 @@ class ScippInputWithDim(IInput):
     def __init__(self,
                  func_arg_names: Sequence[str] = ('x', 'dim'),
                  data_name: str = 'data',
+                 trust_cache: bool = False,
                  **kwargs):
+        """
+        :param trust_cache: If True the evaluated scipp object is reused
+            on click until the expression changes or a name in it is
+            bound to another object. Call invalidate after changing an
+            object in place.
+        """
         self._scope = get_notebook_global_scope()
         self._func_arg_names = func_arg_names
-        self._scipp_obj_input = widgets.Text(placeholder=data_name,
-                                             continuous_update=False,
-                                             **kwargs)
-        self._dimension_input = widgets.Combobox(placeholder='dim',
-                                                 continuous_update=False,
-                                                 **kwargs)
-        self._scipp_obj_input.observe(self._handle_scipp_obj_change, names='value')
-        self._widget = widgets.HBox([self._scipp_obj_input, self._dimension_input])
+        self._data_name = data_name
+        self._widget_kwargs = kwargs
+        self._widget = None
         self._validators = (self._scipp_obj_validator, self._dims_validator)
         self._allowed_dims = []
+        self._obj_cache = ValidationCache(trust_objects=trust_cache)
 
     @property
     def function_arguments(self):
+        if self._widget is None:
+            return {}
         return {
             name: validator(widget.value)
             for name, widget, validator in zip(self._func_arg_names,
-                                               self.widget.children, self._validators)
+                                               self._widget.children, self._validators)
             if widget.value
         }
 
     @property
     def widget(self):
+        if self._widget is None:
+            self._scipp_obj_input = widgets.Text(placeholder=self._data_name,
+                                                 continuous_update=False,
+                                                 **self._widget_kwargs)
+            self._dimension_input = widgets.Combobox(placeholder='dim',
+                                                     continuous_update=False,
+                                                     **self._widget_kwargs)
+            self._scipp_obj_input.observe(self._handle_scipp_obj_change,
+                                          names='value')
+            self._widget = widgets.HBox(
+                [self._scipp_obj_input, self._dimension_input])
         return self._widget
 
+    def snapshot_state(self):
+        return [child.value for child in self.widget.children]
+
+    def restore_state(self, state):
+        for child, value in zip(self.widget.children, state):
+            child.value = value
+
     def _handle_scipp_obj_change(self, change):
         try:
             scipp_obj = self._scipp_obj_validator(change['new'])
             dims = scipp_obj.dims
             self._dimension_input.options = dims
             self._allowed_dims = dims
-        except ValueError:
-            pass
+        except Exception as e:
+            _show_validity(self._scipp_obj_input, e if change['new'] else None)
+        else:
+            _show_validity(self._scipp_obj_input, None)
+
+    def invalidate(self):
+        self._obj_cache.clear()
 
     def _scipp_obj_validator(self, input):
-        scipp_object = _wrapped_eval(input, self._scope)
-        scipp_object_validator(scipp_object)
-        has_dim_validator(scipp_object)
-        return scipp_object
+        key = (input, ) + tuple(self._scope.get(name) for name in _names_in(input))
+        return self._obj_cache.get(key, lambda: self._evaluate_scipp_obj(input))
+
+    def _evaluate_scipp_obj(self, input):
+        scipp_object = scipp_object_validator(_wrapped_eval(input, self._scope))
+        return has_dim_validator(scipp_object)
 
     def _dims_validator(self, input):
         if not input:
@@ -185,7 +367,8 @@ class FileInput(IInput):
                  default_directory: str = os.getcwd(),
                  validator: Callable[[Any], Any] = lambda value: value,
                  file_filter: str = '',
-                 show_only_dirs: bool = False):
+                 show_only_dirs: bool = False,
+                 preview: bool = False):
         """
         :param function_arg_name: Name of function argument this
             input corresponds to.
@@ -196,33 +379,140 @@ class FileInput(IInput):
             string as a substring.
         :param show_only_dirs: If True will only display
             and allow selection of directories.
+        :param preview: If True a summary of the selected file's
+            structure is shown below the file chooser.
         """
-        from ipyfilechooser import FileChooser
-        self._widget = FileChooser(default_directory,
-                                   select_desc='Select file',
-                                   select_default=True,
-                                   change_desc='Select file',
-                                   file_filter=f'*{file_filter}*',
-                                   show_only_dirs=show_only_dirs)
-        self._widget.use_dir_icons = True
+        self._default_directory = default_directory
+        self._preview = preview
+        self._chooser = None
+        self._file_filter = file_filter
+        self._show_only_dirs = show_only_dirs
+        self._widget = None
         self._param_name = function_arg_name
         self._validator = validator
+        self._cache = ValidationCache()
+
+    @property
+    def chooser(self):
+        """
+        Returns the FileChooser, creating it on first access.
+        """
+        if self._chooser is None:
+            from ipyfilechooser import FileChooser
+            self._chooser = FileChooser(self._default_directory,
+                                        select_desc='Select file',
+                                        select_default=True,
+                                        change_desc='Select file',
+                                        file_filter=f'*{self._file_filter}*',
+                                        show_only_dirs=self._show_only_dirs)
+            self._chooser.use_dir_icons = True
+        return self._chooser
 
     @property
     def widget(self):
+        if self._widget is None:
+            self._widget = FilePreviewBox(self.chooser, preview=self._preview)
+            self._widget.register_callback(self._validate_eagerly)
         return self._widget
 
     @property
     def function_arguments(self):
-        return {self._param_name: self._validator(self._widget.selected)}
+        if self._chooser is None:
+            return {self._param_name: self._validator(None)}
+        selected = self._chooser.selected
+        value = self._cache.get(self._cache_key(selected),
+                                lambda: self._validator(selected))
+        return {self._param_name: value}
+
+    def invalidate(self):
+        self._cache.clear()
+
+    def _validate_eagerly(self, chooser):
+        """
+        Validates a newly selected file, marking
+        the chooser if it is invalid.
+        """
+        selected = chooser.selected
+        try:
+            self._cache.get(self._cache_key(selected),
+                            lambda: self._validator(selected))
+        except Exception as e:
+            _show_validity(chooser, e)
+        else:
+            _show_validity(chooser, None)
+
+    def snapshot_state(self):
+        return None if self._chooser is None else self._chooser.selected
+
+    def restore_state(self, state):
+        if state:
+            self.chooser.reset(path=os.path.dirname(state),
+                               filename=os.path.basename(state))
+            self.chooser._apply_selection()
+
+    @staticmethod
+    def _cache_key(path):
+        """
+        A selected file is only validated again once it has been
+        modified, created or deleted.
+        """
+        try:
+            return (path, os.stat(path).st_mtime_ns)
+        except (OSError, TypeError):
+            return (path, None)
+
+
+class FilePreviewBox(widgets.VBox):
+    """
+    Shows a file chooser, optionally above a summary of the selected
+    file. FileChooser only holds a single callback, so callbacks
+    registered here are chained after the preview update.
+    """
+    def __init__(self, chooser, preview: bool = True):
+        self.chooser = chooser
+        self.preview_area = widgets.HTML()
+        self._preview = preview
+        self._callbacks = []
+        super().__init__([chooser, self.preview_area] if preview else [chooser])
+        chooser.register_callback(self._on_select)
+        self._on_select(chooser)
+
+    def register_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def _on_select(self, chooser):
+        from .preview import preview_html
+        if self._preview:
+            selected = chooser.selected
+            if selected and os.path.isfile(selected):
+                self.preview_area.value = preview_html(selected)
+            else:
+                self.preview_area.value = ''
+        for callback in self._callbacks:
+            callback(chooser)
+
+
+_scope_override = None
+
+
+def set_notebook_global_scope(scope):
+    """
+    Makes get_notebook_global_scope return scope instead of
+    searching the stack. Passing None restores the search.
+    """
+    global _scope_override
+    _scope_override = scope
 
 
 def get_notebook_global_scope():
     """
     This gets the global scope of the notebook. It
     assumes the first module called __main__ on the stack
-    is the correct one.
+    is the correct one, unless a scope has been set with
+    set_notebook_global_scope.
     """
+    if _scope_override is not None:
+        return _scope_override
     import inspect
     for module in inspect.stack():
         if module[0].f_globals['__name__'] == '__main__':
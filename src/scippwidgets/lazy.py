@@ -0,0 +1,290 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from typing import Dict, Optional, Sequence, Tuple
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def _axes_of(attrs):
+    axes = attrs.get('axes')
+    if axes is None:
+        return None
+    if isinstance(axes, (str, bytes)):
+        axes = _decode(axes).split(':')
+    return tuple(_decode(axis) for axis in axes)
+
+
+def _find_signal(group) -> Optional[str]:
+    """
+    Returns the path of the first NXdata signal, or plain
+    dataset if there is no NXdata group, below group.
+    """
+    import h5py
+    found = []
+
+    def visit(name, obj):
+        if isinstance(obj, h5py.Group) and 'signal' in obj.attrs:
+            found.append(f'{name}/{_decode(obj.attrs["signal"])}')
+            return True
+
+    group.visititems(visit)
+    if found:
+        return found[0]
+
+    def visit_dataset(name, obj):
+        if isinstance(obj, h5py.Dataset):
+            found.append(name)
+            return True
+
+    group.visititems(visit_dataset)
+    return found[0] if found else None
+
+
+def _forward(name):
+    """
+    Returns a method applying operator name to the loaded data array,
+    loading any lazy operand as well.
+    """
+    def method(self, *args):
+        return getattr(self.load(), name)(*(load_if_lazy(arg) for arg in args))
+
+    method.__name__ = name
+    return method
+
+
+class LazyDataArray():
+    """
+    Proxy for a data array stored in an HDF5 or NeXus file.
+
+    Only metadata is read on creation. Values are read, in chunks
+    along the outermost dimension, when the proxy is sliced or when
+    any other attribute of the underlying data array is used,
+    including in arithmetic and comparisons. Functions which need a
+    real data array, such as sc.sum, should be passed load().
+    """
+    def __init__(self,
+                 filename: str,
+                 path: str,
+                 dims: Optional[Sequence[str]] = None,
+                 chunk_size: int = 1 << 24):
+        """
+        :param filename: HDF5 file to read from.
+        :param path: Path of the dataset within the file. If its parent
+            group is an NXdata group the axes attribute provides the
+            dims, and axis datasets of matching length become coords.
+            A dataset <path>_variances of the same shape provides
+            the variances.
+        :param dims: Dimension labels, overriding those from the file.
+        :param chunk_size: Maximum number of elements to read at once.
+        """
+        import h5py
+        self.filename = filename
+        self.path = path
+        self.chunk_size = chunk_size
+        self._data = None
+        with h5py.File(filename, 'r') as f:
+            dataset = f[path]
+            self.path = dataset.name
+            self.shape = dataset.shape
+            self.dtype = dataset.dtype
+            self.unit = _decode(dataset.attrs.get('units'))
+            group_axes = _axes_of(dataset.parent.attrs)
+            if dims is None:
+                dims = _axes_of(dataset.attrs) or group_axes
+            if dims is None or len(dims) != len(self.shape):
+                dims = tuple(f'dim_{i}' for i in range(len(self.shape)))
+            self.dims = tuple(dims)
+            variances = f.get(f'{self.path}_variances')
+            self.variances_path = None
+            if isinstance(variances, h5py.Dataset) and variances.shape == self.shape:
+                self.variances_path = variances.name
+            self.coord_info = self._find_coords(dataset.parent)
+            self.mask_info = {}
+            masks = dataset.parent.get('masks')
+            if isinstance(masks, h5py.Group):
+                self.mask_info = self._find_coords(masks)
+
+    def _find_coords(self, group) -> Dict[str, Tuple[str, Tuple, Optional[str]]]:
+        """
+        Records path, dims and unit of datasets in group which are
+        named after a dimension or list their dims in an axes
+        attribute, without reading their values.
+        """
+        import h5py
+        coords = {}
+        for name, item in group.items():
+            if not isinstance(item, h5py.Dataset) or item.name in (
+                    self.path, self.variances_path):
+                continue
+            dims = _axes_of(item.attrs)
+            if dims is None and name in self.dims and len(item.shape) == 1:
+                dims = (name, )
+            if self._fits(dims, item.shape):
+                coords[name] = (item.name, dims, _decode(item.attrs.get('units')))
+        return coords
+
+    def _fits(self, dims, shape) -> bool:
+        if dims is None or len(dims) != len(shape):
+            return False
+        sizes = self.sizes
+        return all(dim in sizes and length in (sizes[dim], sizes[dim] + 1)
+                   for dim, length in zip(dims, shape))
+
+    @property
+    def sizes(self):
+        return dict(zip(self.dims, self.shape))
+
+    def __repr__(self):
+        sizes = ', '.join(f'{dim}: {size}' for dim, size in self.sizes.items())
+        return (f'<LazyDataArray ({sizes}) {self.dtype} [{self.unit}] '
+                f'coords={list(self.coord_info)} from {self.filename}:{self.path}>')
+
+    def __getitem__(self, key):
+        """
+        Reads a slice, given scipp style as (dim, index or slice).
+        """
+        dim, index = key
+        if dim not in self.dims:
+            raise ValueError(f'Dimension {dim} does not exist in {self.dims}')
+        if not isinstance(index, (int, slice)):
+            raise ValueError(f'Unsupported index {index}')
+        selection = [slice(None)] * len(self.dims)
+        selection[self.dims.index(dim)] = index
+        return self._read(tuple(selection))
+
+    def load(self):
+        """
+        Reads and returns the full data array, caching it.
+        """
+        if self._data is None:
+            self._data = self._read(tuple(slice(None) for _ in self.dims))
+        return self._data
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    __hash__ = object.__hash__
+    __add__, __radd__ = _forward('__add__'), _forward('__radd__')
+    __sub__, __rsub__ = _forward('__sub__'), _forward('__rsub__')
+    __mul__, __rmul__ = _forward('__mul__'), _forward('__rmul__')
+    __truediv__, __rtruediv__ = _forward('__truediv__'), _forward('__rtruediv__')
+    __floordiv__ = _forward('__floordiv__')
+    __rfloordiv__ = _forward('__rfloordiv__')
+    __mod__, __rmod__ = _forward('__mod__'), _forward('__rmod__')
+    __pow__, __rpow__ = _forward('__pow__'), _forward('__rpow__')
+    __and__, __or__ = _forward('__and__'), _forward('__or__')
+    __xor__ = _forward('__xor__')
+    __eq__, __ne__ = _forward('__eq__'), _forward('__ne__')
+    __lt__, __le__ = _forward('__lt__'), _forward('__le__')
+    __gt__, __ge__ = _forward('__gt__'), _forward('__ge__')
+    __neg__, __abs__ = _forward('__neg__'), _forward('__abs__')
+    __invert__ = _forward('__invert__')
+
+    def _read(self, selection):
+        import h5py
+        import scipp as sc
+        with h5py.File(self.filename, 'r') as f:
+            dataset = f[self.path]
+            values = self._read_chunked(dataset, selection)
+            dims = [dim for dim, index in zip(self.dims, selection)
+                    if not isinstance(index, int)]
+            variances = None
+            if self.variances_path is not None:
+                variances = self._read_chunked(f[self.variances_path], selection)
+            data = sc.array(dims=dims,
+                            values=values,
+                            variances=variances,
+                            unit=self.unit)
+            coords = self._read_meta(f, self.coord_info, selection)
+            masks = self._read_meta(f, self.mask_info, selection)
+        return sc.DataArray(data, coords=coords, masks=masks)
+
+    def _read_meta(self, f, info, selection):
+        """
+        Reads the part of each coord or mask matching selection.
+        Bin edges are skipped if they are indexed by an integer or
+        with a step.
+        """
+        import numpy as np
+        import scipp as sc
+        variables = {}
+        for name, (path, dims, unit) in info.items():
+            dataset = f[path]
+            index = []
+            for dim, length in zip(dims, dataset.shape):
+                item = selection[self.dims.index(dim)]
+                if length != self.sizes[dim]:
+                    if isinstance(item, int):
+                        break
+                    start, stop, step = item.indices(length - 1)
+                    if step != 1:
+                        break
+                    item = slice(start, stop + 1)
+                index.append(item)
+            else:
+                kept = [
+                    dim for dim, item in zip(dims, index) if not isinstance(item, int)
+                ]
+                variables[name] = sc.array(dims=kept,
+                                           values=np.asarray(dataset[tuple(index)]),
+                                           unit=unit)
+        return variables
+
+    def _read_chunked(self, dataset, selection):
+        import numpy as np
+        if not self.shape or isinstance(selection[0], int):
+            return np.asarray(dataset[selection])
+        outer = selection[0]
+        start, stop, step = outer.indices(self.shape[0])
+        rows = range(start, stop, step)
+        row_size = max(1, int(np.prod(self.shape[1:])))
+        rows_per_chunk = max(1, self.chunk_size // row_size)
+        chunks = []
+        for first in range(0, len(rows), rows_per_chunk):
+            block = rows[first:first + rows_per_chunk]
+            if not block:
+                break
+            chunk_selection = (slice(block.start, block.stop, block.step), ) + tuple(
+                selection[1:])
+            chunks.append(np.asarray(dataset[chunk_selection]))
+        if not chunks:
+            return np.asarray(dataset[selection])
+        return np.concatenate(chunks)
+
+
+def load_if_lazy(obj):
+    """
+    Returns the loaded data array if obj is a lazy proxy,
+    otherwise obj itself.
+    """
+    if isinstance(obj, LazyDataArray):
+        return obj.load()
+    return obj
+
+
+def open_lazy(filename: str,
+              path: Optional[str] = None,
+              dims: Optional[Sequence[str]] = None) -> LazyDataArray:
+    """
+    Opens a lazy proxy for data in an HDF5 or NeXus file.
+
+    :param filename: File to open.
+    :param path: Path of the dataset. Defaults to the signal of the
+        first NXdata group, or the first dataset in the file.
+    :param dims: Dimension labels, overriding those from the file.
+    """
+    import h5py
+    if path is None:
+        with h5py.File(filename, 'r') as f:
+            path = _find_signal(f)
+        if path is None:
+            raise ValueError(f'No dataset found in {filename}')
+    return LazyDataArray(filename, path, dims)
@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from functools import lru_cache
+import html
+import mmap
+import os
+import time
+
+
+def _format_attrs(obj, max_attr_bytes):
+    parts = []
+    for name in obj.attrs:
+        if obj.attrs.get_id(name).get_storage_size() > max_attr_bytes:
+            parts.append(f'{name}=...')
+            continue
+        value = obj.attrs[name]
+        if isinstance(value, bytes):
+            value = value.decode(errors='replace')
+        parts.append(f'{name}={value}')
+    return ', '.join(parts)
+
+
+def _preview_hdf5(path, max_items, time_budget, max_attr_bytes):
+    import h5py
+    deadline = time.monotonic() + time_budget
+    lines = []
+
+    def visit(name, obj):
+        if len(lines) >= max_items or time.monotonic() > deadline:
+            lines.append('... (preview truncated)')
+            return True
+        depth = name.count('/')
+        label = name.rsplit('/', 1)[-1]
+        if isinstance(obj, h5py.Dataset):
+            description = f'{label} {obj.shape} {obj.dtype}'
+        else:
+            description = f'{label}/'
+        attrs = _format_attrs(obj, max_attr_bytes)
+        if attrs:
+            description += f' [{attrs}]'
+        lines.append('  ' * depth + description)
+
+    with h5py.File(path, 'r', rdcc_nbytes=0) as f:
+        f.visititems(visit)
+    return '\n'.join(lines)
+
+
+def _preview_bytes(path, max_bytes):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            head = mapped[:max_bytes]
+            truncated = len(mapped) > max_bytes
+    text = head.decode(errors='replace')
+    if truncated:
+        text += '\n... (preview truncated)'
+    return text
+
+
+@lru_cache(maxsize=128)
+def _cached_preview(path, mtime_ns, max_bytes, max_items, time_budget):
+    try:
+        import h5py
+        is_hdf5 = h5py.is_hdf5(path)
+    except ImportError:
+        is_hdf5 = False
+    if is_hdf5:
+        return _preview_hdf5(path, max_items, time_budget, max_bytes)
+    return _preview_bytes(path, max_bytes)
+
+
+def preview_file(path: str,
+                 max_bytes: int = 4096,
+                 max_items: int = 200,
+                 time_budget: float = 0.5) -> str:
+    """
+    Returns a text summary of a file without loading it.
+
+    HDF5 and NeXus files are summarised by their group tree, the
+    shape and dtype of each dataset and their attributes. Other files
+    are summarised by their first bytes, read through a memory map.
+    Results are cached per path and modification time.
+
+    :param path: File to summarise.
+    :param max_bytes: Number of bytes to show of other files, and
+        size above which HDF5 attribute values are omitted.
+    :param max_items: Maximum number of HDF5 groups and datasets to list.
+    :param time_budget: Seconds after which listing HDF5 items stops.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    return _cached_preview(str(path), mtime_ns, max_bytes, max_items, time_budget)
+
+
+def preview_html(path: str, **kwargs) -> str:
+    """
+    Returns the preview_file summary of path formatted as HTML.
+    """
+    try:
+        text = preview_file(path, **kwargs)
+    except (OSError, ValueError) as e:
+        text = f'No preview available: {e}'
+    return f'<pre>{html.escape(text)}</pre>'
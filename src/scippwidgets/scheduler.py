@@ -0,0 +1,195 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from .debounce import get_kernel_loop
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Callable, Optional
+import heapq
+import html
+import itertools
+import os
+import threading
+
+
+class Priority(IntEnum):
+    """
+    Job priorities. Jobs with a lower value are started first.
+    """
+    INTERACTIVE = 0
+    NORMAL = 10
+    BATCH = 20
+
+
+class Job():
+    """
+    A unit of work queued on a JobScheduler.
+    """
+    def __init__(self, func: Callable, name: str, priority: int, memory: int):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.memory = memory
+        self.future = Future()
+
+
+class JobScheduler():
+    """
+    Runs jobs submitted by widgets on background threads,
+    limiting how many run at once and how much memory they
+    are expected to use between them.
+    """
+    def __init__(self,
+                 max_concurrency: Optional[int] = None,
+                 memory_limit: Optional[int] = None):
+        """
+        :param max_concurrency: Maximum number of jobs to run at once.
+            Defaults to the number of cores.
+        :param memory_limit: Maximum total memory estimate, in bytes,
+            of running jobs. A job is always admitted when nothing else
+            is running, so oversized jobs do not block the queue forever.
+        """
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+        self._queue = []
+        self._running = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._status_widgets = []
+        self._status_loop = None
+
+    def submit(self,
+               func: Callable,
+               name: str = '',
+               priority: int = Priority.NORMAL,
+               memory: int = 0) -> Future:
+        """
+        Queues func to be called without arguments.
+
+        :param func: Work to run.
+        :param name: Name shown in the status panel.
+        :param priority: Jobs with lower priority values start first.
+        :param memory: Estimated peak memory use in bytes.
+        :return: Future holding the return value of func. Cancelling
+            it before the job has started removes it from the queue.
+        """
+        job = Job(func, name, priority, memory)
+        with self._lock:
+            heapq.heappush(self._queue, (priority, next(self._counter), job))
+        self._dispatch()
+        return job.future
+
+    @property
+    def queued(self):
+        """
+        Jobs waiting to start, in the order they will be started.
+        """
+        with self._lock:
+            return [
+                job for _, _, job in sorted(self._queue) if not job.future.cancelled()
+            ]
+
+    @property
+    def running(self):
+        with self._lock:
+            return list(self._running)
+
+    def _admits(self, job):
+        if len(self._running) >= self.max_concurrency:
+            return False
+        if self.memory_limit is None or not self._running:
+            return True
+        in_use = sum(running.memory for running in self._running)
+        return in_use + job.memory <= self.memory_limit
+
+    def _dispatch(self):
+        started = []
+        with self._lock:
+            while self._queue:
+                job = self._queue[0][2]
+                if job.future.cancelled():
+                    heapq.heappop(self._queue)
+                    continue
+                if not self._admits(job):
+                    break
+                heapq.heappop(self._queue)
+                job.future.set_running_or_notify_cancel()
+                self._running.append(job)
+                started.append(job)
+        for job in started:
+            threading.Thread(target=self._execute, args=(job, ), daemon=True).start()
+        self._refresh_status()
+
+    def _execute(self, job):
+        try:
+            result = job.func()
+        except BaseException as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        finally:
+            with self._lock:
+                self._running.remove(job)
+            self._dispatch()
+
+    def status_widget(self):
+        """
+        Returns a panel listing running and queued jobs,
+        which is kept up to date as jobs progress.
+        Panels stop being updated once they are closed.
+        """
+        import ipywidgets as widgets
+        status = widgets.HTML()
+        self._status_widgets.append(status)
+        self._status_loop = get_kernel_loop()
+        self._refresh_status()
+        return status
+
+    def _refresh_status(self):
+        """
+        Updates the status panels, on the kernel thread
+        when called from a job thread.
+        """
+        if not self._status_widgets:
+            return
+        loop = self._status_loop
+        if loop is None or threading.current_thread() is threading.main_thread():
+            self._update_status()
+        else:
+            loop.call_soon_threadsafe(self._update_status)
+
+    def _update_status(self):
+        self._status_widgets = [
+            status for status in self._status_widgets if status.comm is not None
+        ]
+        rows = [('running', job) for job in self.running]
+        rows += [('queued', job) for job in self.queued]
+        table = ''.join(f'<tr><td>{state}</td><td>{html.escape(job.name)}</td>'
+                        f'<td>{job.priority}</td></tr>' for state, job in rows)
+        value = ('<table><tr><th>State</th><th>Job</th><th>Priority</th></tr>'
+                 f'{table}</table>')
+        for status in self._status_widgets:
+            status.value = value
+
+
+_scheduler = None
+
+
+def get_scheduler() -> JobScheduler:
+    """
+    Returns the scheduler shared by all widgets in the notebook,
+    creating it with default limits on first use.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = JobScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: JobScheduler):
+    """
+    Replaces the scheduler shared by all widgets in the notebook.
+    """
+    global _scheduler
+    _scheduler = scheduler
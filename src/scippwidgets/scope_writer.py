@@ -0,0 +1,123 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from .debounce import get_kernel_loop
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+import threading
+import warnings
+import weakref
+
+_collision_policies = ('ignore', 'warn', 'error')
+
+
+def _check_collision_policy(on_collision):
+    if on_collision not in _collision_policies:
+        raise ValueError(f'on_collision must be one of {_collision_policies}')
+
+
+class ScopeWriter():
+    """
+    Writes results into a notebook scope.
+
+    Writes from other threads are handed to the kernel thread, so they
+    never interleave with cell execution. Each call writes all of its
+    names at once or, if refused, none of them. Writing a name which
+    already exists and was not written by the same owner is a collision,
+    as is writing a name which was rebound since this writer wrote it.
+    Collisions are recorded and handled according to on_collision,
+    which can also be given per write.
+    """
+    def __init__(self, scope: Dict[str, Any], on_collision: str = 'warn'):
+        """
+        :param scope: Scope to write to, usually the notebook globals.
+        :param on_collision: 'ignore', 'warn' or 'error'. With 'error'
+            a write containing a collision is refused with a ValueError.
+        """
+        _check_collision_policy(on_collision)
+        self.scope = scope
+        self.on_collision = on_collision
+        self.collisions = []
+        self._written = {}  # name -> (owner, id of the value written)
+        self._lock = threading.RLock()
+        self._loop = get_kernel_loop()
+
+    def write(self,
+              values: Dict[str, Any],
+              owner: Optional[str] = None,
+              on_collision: Optional[str] = None) -> Future:
+        """
+        Writes values into the scope as a single batch.
+
+        :param values: Objects to write, by name.
+        :param owner: Name of the writer, for example the widget name.
+            Rewriting a name with the same owner is not a collision.
+        :param on_collision: Overrides the on_collision of the writer
+            for this write.
+        :return: Future which completes once the values are in the
+            scope. Called from the kernel thread the values are written
+            immediately, and collision errors are raised directly.
+        """
+        if on_collision is None:
+            on_collision = self.on_collision
+        _check_collision_policy(on_collision)
+        future = Future()
+        if self._loop is None or threading.current_thread() is threading.main_thread():
+            self._write(values, owner, on_collision)
+            future.set_result(list(values))
+        else:
+            self._loop.call_soon_threadsafe(self._write_to_future, values, owner,
+                                            on_collision, future)
+        return future
+
+    def _write_to_future(self, values, owner, on_collision, future):
+        try:
+            self._write(values, owner, on_collision)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(list(values))
+
+    def _write(self, values, owner, on_collision):
+        with self._lock:
+            collisions = [(name, self._owner_of(name), owner) for name in values
+                          if name in self.scope and self._owner_of(name) != owner]
+            self.collisions += collisions
+            if collisions:
+                self._report(collisions, on_collision)
+            self.scope.update(values)
+            self._written.update(
+                {name: (owner, id(value)) for name, value in values.items()})
+
+    def _owner_of(self, name):
+        """
+        Returns the owner of the value of name in the scope, or None
+        if it was not written by this writer or was rebound since.
+        """
+        owner, written = self._written.get(name, (None, None))
+        return owner if written == id(self.scope[name]) else None
+
+    def _report(self, collisions, on_collision):
+        names = ', '.join(name for name, _, _ in collisions)
+        if on_collision == 'error':
+            raise ValueError(f'Refusing to overwrite existing names in scope: {names}')
+        if on_collision == 'warn':
+            warnings.warn(f'Overwriting existing names in scope: {names}', stacklevel=4)
+
+
+_writers = weakref.WeakValueDictionary()
+
+
+def get_scope_writer(scope: Dict[str, Any]) -> ScopeWriter:
+    """
+    Returns the writer shared by everything writing to scope,
+    creating one on first use.
+    Writers are only kept alive by their users, such as widgets,
+    so neither they nor their scopes outlive them.
+    """
+    writer = _writers.get(id(scope))
+    if writer is None or writer.scope is not scope:
+        writer = ScopeWriter(scope)
+        _writers[id(scope)] = writer
+    return writer
@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+from .widgets import WidgetBase, registered_widgets
+from .scope_writer import get_scope_writer
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import os
+import pickle
+import warnings
+
+SNAPSHOT_VERSION = 1
+
+
+_missing_policies = ('ignore', 'warn', 'error')
+
+
+def _by_name(widgets: Optional[Iterable[WidgetBase]]):
+    """
+    Returns widgets, or all named widgets alive in the kernel, by name.
+    Widgets without an explicit name are refused, as their default
+    names depend on how often cells have been run.
+    """
+    if widgets is None:
+        return {
+            name: widget
+            for name, widget in registered_widgets().items() if widget.explicit_name
+        }
+    widgets = list(widgets)
+    unnamed = [widget.name for widget in widgets if not widget.explicit_name]
+    if unnamed:
+        raise ValueError(f'Widgets need a name to be snapshot: {", ".join(unnamed)}')
+    return {widget.name: widget for widget in widgets}
+
+
+def snapshot(widgets: Optional[Iterable[WidgetBase]] = None,
+             results_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Records the input values and output names of widgets.
+
+    :param widgets: Widgets to record. Defaults to all named widgets
+        alive in the kernel.
+    :param results_dir: If given, the objects widgets last wrote
+        to the scope are pickled into this directory, so restore can
+        put them back without running the widgets again.
+    :return: JSON compatible snapshot.
+    """
+    state = {}
+    for name, widget in _by_name(widgets).items():
+        widget_state = widget.snapshot_state()
+        target = widget_state.get('target')
+        scope = getattr(widget, 'scope', None)
+        if results_dir is not None and scope is not None and target in scope:
+            filename = f'{name}.pkl'
+            with open(os.path.join(results_dir, filename), 'wb') as f:
+                pickle.dump(scope[target], f, protocol=pickle.HIGHEST_PROTOCOL)
+            widget_state['result'] = filename
+        state[name] = widget_state
+    return {'version': SNAPSHOT_VERSION, 'widgets': state}
+
+
+def restore(state: Dict[str, Any],
+            widgets: Optional[Iterable[WidgetBase]] = None,
+            results_dir: Optional[str] = None,
+            on_missing: str = 'warn') -> List[str]:
+    """
+    Restores the input values and output names recorded by snapshot
+    onto the widgets with the same names. Widgets are not run.
+
+    :param state: Snapshot to restore.
+    :param widgets: Widgets to restore. Defaults to all named widgets
+        alive in the kernel.
+    :param results_dir: Directory results were saved to by snapshot.
+        Saved results are unpickled straight into the scope, so only
+        use directories you trust.
+    :param on_missing: 'ignore', 'warn' or 'error', for recorded
+        widgets with no widget of the same name to restore onto.
+        With 'error' nothing is restored and a ValueError is raised.
+    :return: Names of the widgets which were restored.
+    """
+    if state.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f'Unsupported snapshot version {state.get("version")}')
+    if on_missing not in _missing_policies:
+        raise ValueError(f'on_missing must be one of {_missing_policies}')
+    by_name = _by_name(widgets)
+    missing = [name for name in state['widgets'] if name not in by_name]
+    if missing:
+        message = f'No widgets named {", ".join(missing)} to restore'
+        if on_missing == 'error':
+            raise ValueError(message)
+        if on_missing == 'warn':
+            warnings.warn(message, stacklevel=2)
+    restored = []
+    results = []
+    for name, widget_state in state['widgets'].items():
+        widget = by_name.get(name)
+        if widget is None:
+            continue
+        widget.restore_state(widget_state)
+        filename = widget_state.get('result')
+        if results_dir is not None and filename is not None:
+            with open(os.path.join(results_dir, filename), 'rb') as f:
+                results.append((widget, {widget_state['target']: pickle.load(f)}))
+        restored.append(name)
+    for widget, values in results:
+        # Written as the widget's own result, through the writer it
+        # keeps alive, so running it again is not reported as a collision.
+        widget._scope_writer = get_scope_writer(widget.scope)
+        widget._scope_writer.write(values, owner=widget.name, on_collision='ignore')
+    return restored
+
+
+def save_snapshot(filename: str, **kwargs):
+    """
+    Writes a snapshot to a JSON file. kwargs are passed to snapshot.
+    """
+    with open(filename, 'w') as f:
+        json.dump(snapshot(**kwargs), f)
+
+
+def load_snapshot(filename: str, **kwargs) -> List[str]:
+    """
+    Restores a snapshot from a JSON file. kwargs are passed to restore.
+    """
+    with open(filename) as f:
+        return restore(json.load(f), **kwargs)
@@ -0,0 +1,126 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+"""
+Tools for exercising scippwidgets without a notebook or frontend,
+for tests and benchmarks.
+"""
+from . import inputs
+from .widgets import WidgetBase
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Sequence
+import time
+
+
+@contextmanager
+def synthetic_scope(scope: Optional[Dict[str, Any]] = None):
+    """
+    Context manager making inputs and widgets created inside it use
+    scope, or a new empty dict, as the notebook scope.
+    """
+    scope = {} if scope is None else scope
+    previous = inputs._scope_override
+    inputs.set_notebook_global_scope(scope)
+    try:
+        yield scope
+    finally:
+        inputs.set_notebook_global_scope(previous)
+
+
+@contextmanager
+def no_frontend():
+    """
+    Context manager under which widgets open no-op comms and
+    nothing is sent for display. Requires ipywidgets 8 and comm.
+    """
+    try:
+        import comm
+        import ipywidgets.comm
+    except ImportError as e:
+        raise ImportError('no_frontend requires ipywidgets>=8 and comm, '
+                          'install them with the testing extra') from e
+    from . import widgets
+
+    def create_dummy_comm(*args, **kwargs):
+        return comm.DummyComm(*args, **kwargs)
+
+    create_comm = ipywidgets.comm.create_comm
+    display = widgets.display
+    ipywidgets.comm.create_comm = create_dummy_comm
+    widgets.display = lambda *args, **kwargs: None
+    try:
+        yield
+    finally:
+        ipywidgets.comm.create_comm = create_comm
+        widgets.display = display
+
+
+@contextmanager
+def headless(scope: Optional[Dict[str, Any]] = None):
+    """
+    Combines synthetic_scope and no_frontend, yielding the scope.
+    """
+    with synthetic_scope(scope) as scope, no_frontend():
+        yield scope
+
+
+class WidgetDriver():
+    """
+    Drives a widget as a user would, by setting input values
+    and clicking its button, and records the results.
+    """
+    def __init__(self, widget: WidgetBase):
+        self.widget = widget
+        self.results = []
+        widget.build()
+        widget.on_result(self.results.append)
+
+    def set_inputs(self, *values, output: Optional[str] = None):
+        """
+        Sets input values in the order of the widget's inputs, given
+        in the form returned by IInput.snapshot_state. None leaves an
+        input unchanged. output sets the output name of a ProcessWidget.
+        """
+        for input, value in zip(self.widget.inputs, values):
+            if value is not None:
+                input.restore_state(value)
+        if output is not None:
+            self.widget.output.value = output
+
+    def click(self, timeout: float = 10):
+        """
+        Clicks the button and, for background runs, waits
+        until the result has been handled.
+        """
+        self.widget.button.click()
+        self.wait(timeout)
+
+    def wait(self, timeout: float = 10):
+        """
+        Waits for a background run to finish and its result to be
+        handled, see WidgetBase.wait.
+        """
+        self.widget.wait(timeout)
+
+    @property
+    def last_result(self):
+        return self.results[-1] if self.results else None
+
+    def run(self, *values, output: Optional[str] = None):
+        """
+        Sets inputs, clicks and returns the result.
+        """
+        self.set_inputs(*values, output=output)
+        self.click()
+        return self.last_result
+
+    def run_many(self, value_sets: Iterable[Sequence[Any]]) -> float:
+        """
+        Runs once per set of input values and
+        returns the elapsed time in seconds.
+        """
+        start = time.perf_counter()
+        for values in value_sets:
+            self.run(*values)
+        return time.perf_counter() - start
@@ -47,9 +47,14 @@ class ValueValidator():
 
 
 def ScippObjectValidator():
+    """
+    Creates a validator callable accepting scipp objects and lazy
+    proxies for them. Proxies are passed on without being loaded.
+    """
     import scipp as sc
+    from .lazy import LazyDataArray
 
-    scipp_object = (sc.DataArray, sc.Dataset, sc.Variable)
+    scipp_object = (sc.DataArray, sc.Dataset, sc.Variable, LazyDataArray)
     return TypeValidator(scipp_object)
 
 
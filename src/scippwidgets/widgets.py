@@ -5,9 +5,22 @@
 
 import ipywidgets as widgets
 from .inputs import get_notebook_global_scope, IInput, Input
+from .debounce import Debouncer, get_kernel_loop
+from .scheduler import Priority, get_scheduler
+from .capture import BufferedOutput
+from .executors import IExecutor, InProcessExecutor
+from .chunked import Chunking
+from .scope_writer import _check_collision_policy, get_scope_writer
+from .lazy import load_if_lazy
 from IPython.core.display import display, Javascript
-from typing import Callable, Iterable, Dict, Any
+from typing import Callable, Iterable, Dict, Any, Optional, Union
+from concurrent import futures
+from functools import partial
 import pathlib
+import time
+import traceback
+import warnings
+import weakref
 
 javascript_functions = {False: "hide()", True: "show()"}
 
@@ -48,16 +61,63 @@ class HideCodeWidget(widgets.Box):
         toggle_code(value.new, self.output_widget)
 
 
+def _observe_value(widget, callback):
+    """
+    Registers callback for value changes of widget, or of
+    all its children for container widgets.
+    """
+    if widget.has_trait('value'):
+        widget.observe(callback, names='value')
+    elif hasattr(widget, 'register_callback'):
+        widget.register_callback(callback)
+    else:
+        for child in getattr(widget, 'children', ()):
+            _observe_value(child, callback)
+
+
+_instances = weakref.WeakValueDictionary()
+
+
+def registered_widgets():
+    """
+    Returns the scippwidgets alive in this kernel, by name.
+    """
+    return dict(_instances)
+
+
+def _unique_name(wrapped_func, widget_type):
+    base = getattr(wrapped_func, '__name__', '<lambda>')
+    if base == '<lambda>':
+        base = widget_type.__name__
+    name = base
+    index = 1
+    while name in _instances:
+        index += 1
+        name = f'{base}_{index}'
+    return name
+
+
 class WidgetBase(widgets.Box):
     """
     Abstract base class for scippwidgets.
     """
+    default_priority = Priority.NORMAL
+
     def __init__(self,
                  wrapped_func: Callable,
                  inputs: Iterable[IInput],
                  button_name: str = 'Process',
                  layout='row wrap',
-                 hide_code: bool = False):
+                 hide_code: bool = False,
+                 lazy: bool = False,
+                 auto_run: bool = False,
+                 debounce: float = 0.3,
+                 background: bool = False,
+                 priority: Optional[int] = None,
+                 memory_estimate: Union[int, Callable[[Dict[str, Any]], int]] = 0,
+                 output_capture: Optional[BufferedOutput] = None,
+                 executor: Optional[IExecutor] = None,
+                 name: Optional[str] = None):
         """
         :param wrapped_func: The function to call.
         :param inputs: List of input specifiers.
@@ -68,27 +128,112 @@ class WidgetBase(widgets.Box):
             For a full list of options see
             https://ipywidgets.readthedocs.io/en/latest/examples/Widget%20Styling.html
         :param hide_code: Flag controlling whether to hide code.
+        :param lazy: If True child widgets, and their comms, are only
+            created when this widget is first displayed or build is called.
+            This widget itself and its layout still open their comms
+            straight away. Displaying a container does not display its
+            children, so a lazy widget inside a plain Box or VBox stays
+            empty until build is called. Use build_on_select for Tab and
+            Accordion pages.
+        :param auto_run: If True the wrapped function is re-run whenever
+            an input changes, without clicking the button.
+        :param debounce: Seconds without further input changes to wait
+            before an automatic run. Changes made in the meantime are
+            coalesced into a single run.
+        :param background: If True the wrapped function is run by the
+            notebook-wide job scheduler instead of blocking the kernel.
+            A new run discards the result of any run still in progress.
+        :param priority: Scheduler priority of background runs, lower
+            values start first. Defaults to the class default_priority.
+        :param memory_estimate: Estimated peak memory in bytes of a
+            background run, or a callable computing it from the kwargs
+            passed to the wrapped function. Used for admission by the
+            scheduler.
+        :param output_capture: If given, printed and logged output of the
+            wrapped function is buffered by it and shown at a bounded
+            rate rather than line by line. Not supported with executors
+            running the function in other processes.
+        :param executor: Backend calling the wrapped function, for
+            example a thread, process or dask pool. Defaults to calling
+            it in the kernel process. With background set the scheduler
+            admits the job before it is handed to the executor.
+        :param name: Identifies this widget in snapshots, which only
+            include widgets given a name. A new widget with the name of
+            an existing one replaces it, closing the old one with a
+            warning unless it was already closed, as when a cell is
+            run again. Defaults to the name of the wrapped
+            function, suffixed to make it unique.
         """
         super().__init__()
         self.layout.flex_flow = 'column'
         self.callable = wrapped_func
         self.inputs = inputs
+        self._button_name = button_name
+        self._widget_layout = layout
+        self._hide_code = hide_code
+        self.auto_run = auto_run
+        self._debounced_run = Debouncer(self._run, debounce)
+        self.background = background
+        self.priority = self.default_priority if priority is None else priority
+        self._memory_estimate = memory_estimate
+        self._generation = 0
+        self._job = None
+        self._job_loop = None
+        self._job_finish = None
+        self._result_callbacks = []
+        self.output_capture = output_capture
+        self.executor = InProcessExecutor() if executor is None else executor
+        if output_capture is not None and not self.executor.in_process:
+            warnings.warn(f'{type(self.executor).__name__} runs functions in other '
+                          'processes, so their output cannot be captured')
+        self.name = name or _unique_name(wrapped_func, type(self))
+        self.explicit_name = name is not None
+        self.last_target = None
+        self._auto_run_held = False
+        replaced = _instances.get(self.name)
+        if replaced is not None and replaced.comm is not None:
+            warnings.warn(f'Closing the existing widget named {self.name}, '
+                          'which is replaced by this one',
+                          stacklevel=3)
+            replaced.close()
+        _instances[self.name] = self
+        self._built = False
+        if not lazy:
+            self.build()
+
+    def build(self):
+        """
+        Creates the child widgets if this has not already been done.
+        """
+        if self._built:
+            return
+        self._built = True
+        self._create_widgets()
+        self.children = [self.widget_area, self.output_widgets]
+
+    def _create_widgets(self):
         self.input_widgets = []
-        self._setup_input_widgets(inputs)
+        self._setup_input_widgets(self.inputs)
 
-        self.button = widgets.Button(description=button_name)
+        self.button = widgets.Button(description=self._button_name)
         self.button.on_click(self._on_button_clicked)
         self.button_widgets = [self.button]
-        if (hide_code):
+        if (self._hide_code):
             self.button_widgets += (HideCodeWidget(True), )
 
         self.output_area = widgets.Output()
         self.output_widgets = widgets.VBox([self.output_area])
 
         self.widget_area = widgets.Box(self.input_widgets + self.button_widgets)
-        self.widget_area.layout.flex_flow = layout
+        self.widget_area.layout.flex_flow = self._widget_layout
 
-        self.children = [self.widget_area, self.output_widgets]
+        if self.auto_run:
+            for widget in self.input_widgets:
+                _observe_value(widget, self._on_input_change)
+
+    def _repr_mimebundle_(self, **kwargs):
+        self.build()
+        return super()._repr_mimebundle_(**kwargs)
 
     def _setup_input_widgets(self, inputs):
         """
@@ -109,44 +254,332 @@ class WidgetBase(widgets.Box):
         return kwargs
 
     def _on_button_clicked(self, button):
+        self._debounced_run.cancel()
+        self._run()
+
+    def _on_input_change(self, change):
+        if not self._auto_run_held:
+            self._debounced_run()
+
+    def snapshot_state(self):
+        """
+        Returns the input values of this widget and where its last
+        result went, as JSON compatible values.
+        """
+        self.build()
+        return {
+            'inputs': [input.snapshot_state() for input in self.inputs],
+            'target': self.last_target
+        }
+
+    def restore_state(self, state):
+        """
+        Restores input values from snapshot_state without running.
+        """
+        self.build()
+        self._auto_run_held = True
+        try:
+            for input, input_state in zip(self.inputs, state['inputs']):
+                input.restore_state(input_state)
+        finally:
+            self._auto_run_held = False
+        self.last_target = state.get('target')
+
+    def on_result(self, callback: Callable[[Any], None]):
+        """
+        Registers callback to be called with each result once it
+        has been handled, on the kernel thread.
+        """
+        self._result_callbacks.append(callback)
+
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Waits until the current background run, if any, has finished
+        and its result has been handled. When called on the kernel
+        thread, which cannot hand the result back while blocked here,
+        the result is handled directly.
+
+        :param timeout: Seconds to wait, or None to wait indefinitely.
+        """
+        job = self._job
+        if job is None:
+            return
+        done, _ = futures.wait([job], timeout)
+        if not done:
+            raise TimeoutError(f'{self.name} did not finish in {timeout}s')
+        if self._job_loop is not None and self._job_loop is get_kernel_loop():
+            self._job_finish()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._job is job and not job.cancelled():
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f'{self.name} did not finish in {timeout}s')
+            time.sleep(0.001)
+
+    def _run(self):
+        self._generation += 1
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
         self.output_area.clear_output()
         with self.output_area:
             try:
                 kwargs = self._retrieve_kwargs()
+                target = self._result_target(kwargs)
             except ValueError as e:
                 print(f'Invalid inputs: {e}')
                 return
 
-            self._process(kwargs)
+            if self.background:
+                self._submit(kwargs, target)
+            else:
+                self._store_result(target, self._call(kwargs))
+
+    def _submit(self, kwargs, target):
+        """
+        Queues a call of the wrapped function on the job scheduler.
+        The result is handled on the kernel thread once it arrives,
+        unless a newer run has been started since.
+        """
+        generation = self._generation
+        loop = get_kernel_loop()
+        memory = self._memory_estimate
+        if callable(memory):
+            memory = memory(kwargs)
+        self._job = get_scheduler().submit(partial(self._call, kwargs),
+                                           name=self.name,
+                                           priority=self.priority,
+                                           memory=memory)
+        finish = partial(self._finish_job, generation, target, self._job)
+        self._job_loop, self._job_finish = loop, finish
+
+        def on_done(future):
+            if loop is None:
+                finish()
+            else:
+                loop.call_soon_threadsafe(finish)
+
+        print('Queued...')
+        self._job.add_done_callback(on_done)
+
+    def _finish_job(self, generation, target, future):
+        """
+        Handles the result of a finished job. Does nothing if the
+        job has been superseded or already handled.
+        """
+        if (generation != self._generation or future is not self._job
+                or future.cancelled()):
+            return
+        if self.output_capture is None:
+            self.output_area.clear_output()
+        try:
+            with self.output_area:
+                error = future.exception()
+                if error is not None:
+                    traceback.print_exception(type(error), error, error.__traceback__)
+                    return
+                self._store_result(target, future.result())
+        finally:
+            self._job = None
+
+    def _call(self, kwargs):
+        """
+        Calls the wrapped function through the executor, capturing
+        its output if an output_capture is set. Output is captured on
+        the threads the executor calls the function on, which is not
+        possible for executors running it in other processes.
+        """
+        if self.output_capture is None or not self.executor.in_process:
+            return self._execute(self.callable, kwargs)
+        with self.output_capture.capture(self.output_area) as capture:
+            return self._execute(partial(_call_captured, capture, self.callable),
+                                 kwargs)
+
+    def _execute(self, func, kwargs):
+        return self.executor.run(func, **kwargs)
 
-    def _process(self, kwargs):
+    def _result_target(self, kwargs):
+        """
+        Determines where the result of a run goes before the
+        wrapped function is called.
+        Raises ValueError if this cannot be done.
+        """
+        return None
+
+    def _store_result(self, target, result):
+        self.last_target = target
+        self._handle_result(target, result)
+        for callback in self._result_callbacks:
+            callback(result)
+
+    def _handle_result(self, target, result):
         pass
 
 
+def _call_captured(capture, func, *args, **kwargs):
+    """
+    Calls func with output of the calling thread going to capture.
+    """
+    with capture.attach():
+        return func(*args, **kwargs)
+
+
+def _close_widget_tree(widget):
+    """
+    Closes widget and, as Widget.close does not, the widgets it contains.
+    """
+    for child in getattr(widget, 'children', ()):
+        if isinstance(child, widgets.Widget):
+            _close_widget_tree(child)
+    widget.close()
+
+
+def _has_same_structure(first, second):
+    """
+    Checks whether two results can be swapped into the same figure.
+    Scipp objects must agree in dims, shape, unit and coordinate names,
+    other objects only in type.
+    """
+    if type(first) is not type(second):
+        return False
+    if not hasattr(first, 'dims'):
+        return True
+    for attr in ('dims', 'shape', 'unit'):
+        if getattr(first, attr, None) != getattr(second, attr, None):
+            return False
+    if hasattr(first, 'coords'):
+        return set(first.coords.keys()) == set(second.coords.keys())
+    return True
+
+
 class DisplayWidget(WidgetBase):
     """
     Provides a simple graphical wrapper around a given callable,
     displaying the return value.
     """
+    default_priority = Priority.INTERACTIVE
+
     def __init__(self,
                  wrapped_func: Callable,
                  inputs: Iterable[IInput],
                  button_name: str = 'Display',
                  layout: str = 'row wrap',
-                 hide_code=False):
-        super().__init__(wrapped_func, inputs, button_name, layout, hide_code)
+                 hide_code=False,
+                 update_in_place: bool = False,
+                 **kwargs):
+        """
+        :param update_in_place: If True the displayed figure is kept
+            between runs and, when the new result has the same structure
+            as the previous one, updated rather than recreated.
+            Subclasses define how a figure is updated by overriding
+            _update_figure.
+        :param kwargs: Passed on to WidgetBase.
+        """
+        self.update_in_place = update_in_place
+        self._figure = None
+        self._result = None
+        super().__init__(wrapped_func, inputs, button_name, layout, hide_code, **kwargs)
+
+    def _create_widgets(self):
+        super()._create_widgets()
+        if self.update_in_place:
+            self.figure_area = widgets.Output()
+            self.output_widgets.children = [self.output_area, self.figure_area]
+
+    def _handle_result(self, target, result):
+        if not self.update_in_place:
+            display(self._make_figure(result))
+        elif self._figure is not None and _has_same_structure(self._result, result):
+            self._update_figure(result)
+        else:
+            self._replace_figure(result)
+        self._result = result
+
+    def _replace_figure(self, result):
+        """
+        Discards the current figure, closing any frontend
+        models it owns, and displays a new one.
+        """
+        if self._figure is not None:
+            self._close_figure(self._figure)
+        self._figure = self._make_figure(result)
+        self._show_figure()
 
-    def _process(self, kwargs):
-        display(self.callable(**kwargs))
+    def _show_figure(self):
+        """
+        Displays the current figure in the figure area. Figures which
+        are not widgets are displayed as a snapshot, so must be shown
+        again after they change.
+        """
+        self.figure_area.outputs = ()
+        self.figure_area.append_display_data(self._figure)
+
+    def _close_figure(self, figure):
+        """
+        Closes the frontend models of a discarded figure.
+        """
+        if isinstance(figure, widgets.Widget):
+            _close_widget_tree(figure)
+
+    def _make_figure(self, result):
+        """
+        Creates the object to display from the result.
+        """
+        return result
+
+    def _update_figure(self, result):
+        """
+        Swaps the data shown in the current figure for result.
+        Falls back to recreating the figure.
+        """
+        self._replace_figure(result)
 
 
-def PlotWidget(hide_code=False, layout='row wrap'):
-    import scipp as sc
-    return DisplayWidget(wrapped_func=sc.plot,
+class PlotWidget(DisplayWidget):
+    """
+    Plots a scipp object, or lazy proxy, from the notebook scope.
+    """
+    def __init__(self,
+                 hide_code=False,
+                 layout='row wrap',
+                 update_in_place=False,
+                 **kwargs):
+        """
+        :param update_in_place: If True re-plotting data with the same
+            structure updates the existing figure. Requires plopp,
+            installed with the plot extra. Figures of interactive
+            backends update in place, static figures are redrawn and
+            shown again.
+        :param kwargs: Passed on to WidgetBase.
+        """
+        super().__init__(wrapped_func=lambda scipp_obj: load_if_lazy(scipp_obj),
                          inputs=(Input('scipp_obj'), ),
                          button_name='Plot',
                          layout=layout,
-                         hide_code=hide_code)
+                         hide_code=hide_code,
+                         update_in_place=update_in_place,
+                         **kwargs)
+        self._node = None
+
+    def _make_figure(self, result):
+        if not self.update_in_place:
+            import scipp as sc
+            return sc.plot(result)
+        import plopp as pp
+        self._node = pp.Node(result)
+        return pp.plot(self._node)
+
+    def _update_figure(self, result):
+        self._node.func = lambda: result
+        self._node.notify_children('data updated')
+        if not isinstance(self._figure, widgets.Widget):
+            self._show_figure()
+
+    def _close_figure(self, figure):
+        super()._close_figure(figure)
+        fig = getattr(figure, 'fig', None)
+        if fig is not None:
+            import matplotlib.pyplot as plt
+            plt.close(fig)
 
 
 class ProcessWidget(WidgetBase):
@@ -159,33 +592,67 @@ class ProcessWidget(WidgetBase):
                  inputs: Iterable[IInput],
                  button_name: str = 'Process',
                  hide_code: bool = False,
-                 layout='row wrap'):
+                 layout='row wrap',
+                 chunking: Optional[Chunking] = None,
+                 on_collision: str = 'ignore',
+                 **kwargs):
+        """
+        :param chunking: If given, one argument is streamed through the
+            wrapped function in slices, which are run through the executor
+            and combined as described by the Chunking.
+        :param on_collision: 'ignore', 'warn' or 'error', for results
+            overwriting a name in scope not written by this widget.
+        :param kwargs: Passed on to WidgetBase.
+        """
+        _check_collision_policy(on_collision)
+        self.chunking = chunking
+        self.on_collision = on_collision
+        self._scope_writer = None
         super().__init__(wrapped_func,
                          inputs,
                          button_name,
                          hide_code=hide_code,
-                         layout=layout)
+                         layout=layout,
+                         **kwargs)
         self.scope = get_notebook_global_scope()
 
+    def _create_widgets(self):
+        super()._create_widgets()
         self.output = widgets.Text(placeholder='output name',
                                    value='',
                                    continuous_update=False)
         self.widget_area.children = self.input_widgets + [self.output
                                                           ] + self.button_widgets
 
-    def _process(self, kwargs):
+    def snapshot_state(self):
+        state = super().snapshot_state()
+        state['output'] = self.output.value
+        return state
+
+    def restore_state(self, state):
+        super().restore_state(state)
+        self.output.value = state.get('output', '')
+
+    def _execute(self, func, kwargs):
+        if self.chunking is None:
+            return super()._execute(func, kwargs)
+        return self.chunking.run(func, kwargs, self.executor)
+
+    def _result_target(self, kwargs):
+        if not self.output.value:
+            raise ValueError('No output name specified')
+        return self.output.value
+
+    def _handle_result(self, output_name, output):
         """
-        Calls the wrapped function using the
-        parameter values specified.
+        Adds the return value of the wrapped
+        function to scope under output_name.
         """
-        if self.output.value:
-            output_name = self.output.value
-        else:
-            print('Invalid inputs: No output name specified')
-            return
-        output = self.callable(**kwargs)
-        self.scope[output_name] = output
-        display(self.scope[output_name])
+        self._scope_writer = get_scope_writer(self.scope)
+        self._scope_writer.write({output_name: output},
+                                 owner=self.name,
+                                 on_collision=self.on_collision)
+        display(output)
 
 
 class LoadWidget(WidgetBase):
@@ -194,6 +661,8 @@ class LoadWidget(WidgetBase):
     adding the return value to the notebooks scope labelled
     by file name.
     """
+    default_priority = Priority.BATCH
+
     def __init__(self,
                  wrapped_func: Callable,
                  inputs: Iterable[IInput],
@@ -202,26 +671,77 @@ class LoadWidget(WidgetBase):
                  obj_name_generator: Callable[
                      [Dict[str, Any]],
                      str] = lambda kwargs: pathlib.Path(kwargs['filename']).stem,
-                 hide_code: bool = False):
+                 hide_code: bool = False,
+                 proxy_loader: Optional[Callable[[str], Any]] = None,
+                 on_collision: str = 'ignore',
+                 **kwargs):
         """
         :param obj_name_factory: This is a callable
             which takes as input the kwargs passed to
             the load function and returns the name
             to use for the loaded object.
+        :param proxy_loader: If given, a 'Lazy' checkbox is shown. When
+            it is ticked this is called with the filename instead of
+            wrapped_func, and should return a proxy that reads data on
+            demand, such as scippwidgets.lazy.open_lazy.
+        :param on_collision: 'ignore', 'warn' or 'error', for loaded
+            objects overwriting a name in scope not written by this widget.
+        :param kwargs: Passed on to WidgetBase.
         """
+        _check_collision_policy(on_collision)
+        self._proxy_loader = proxy_loader
+        self.on_collision = on_collision
+        self._scope_writer = None
         super().__init__(wrapped_func,
                          inputs,
                          button_name,
                          hide_code=hide_code,
-                         layout=layout)
+                         layout=layout,
+                         **kwargs)
         self.scope = get_notebook_global_scope()
         self._obj_name_generator = obj_name_generator
 
-    def _process(self, kwargs):
+    def _create_widgets(self):
+        super()._create_widgets()
+        if self._proxy_loader is not None:
+            self.lazy_load = widgets.Checkbox(value=True,
+                                              description='Lazy',
+                                              indent=False)
+            self.widget_area.children = self.input_widgets + [
+                self.lazy_load
+            ] + self.button_widgets
+
+    def _call(self, kwargs):
+        if self._proxy_loader is not None and self.lazy_load.value:
+            return self._proxy_loader(kwargs['filename'])
+        return super()._call(kwargs)
+
+    def _result_target(self, kwargs):
+        return self._obj_name_generator(kwargs)
+
+    def _handle_result(self, name, output):
         """
-        Calls the wrapped function using the
-        parameter values specified.
+        Adds the loaded object to scope under name.
         """
-        output = self.callable(**kwargs)
-        name = self._obj_name_generator(kwargs)
-        self.scope[name] = output
+        self._scope_writer = get_scope_writer(self.scope)
+        self._scope_writer.write({name: output},
+                                 owner=self.name,
+                                 on_collision=self.on_collision)
+
+
+def build_on_select(container: widgets.Box):
+    """
+    Builds lazy widgets held in a Tab or Accordion when their
+    page is selected, starting with the currently selected page.
+    """
+    def build_selected(change=None):
+        index = container.selected_index
+        if index is None:
+            return
+        child = container.children[index]
+        if isinstance(child, WidgetBase):
+            child.build()
+
+    container.observe(build_selected, names='selected_index')
+    build_selected()
+    return container
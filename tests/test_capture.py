@@ -0,0 +1,164 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.capture import BufferedOutput
+import asyncio
+import io
+import ipywidgets
+import logging
+import sys
+import threading
+import time
+
+
+def _printing_func(lines):
+    for i in range(lines):
+        print(f'line {i}')
+    logging.getLogger('reduction').warning('done')
+
+
+def test_buffered_output_keeps_only_recent_lines():
+    output = ipywidgets.Output()
+    buffer = BufferedOutput(max_lines=3, flush_interval=60)
+
+    with buffer.capture(output):
+        _printing_func(10)
+
+    assert output.outputs[0]['text'] == 'line 8\nline 9\nWARNING:reduction:done\n'
+
+
+def test_buffered_output_limits_widget_updates():
+    output = ipywidgets.Output()
+    updates = []
+    output.observe(updates.append, names='outputs')
+    buffer = BufferedOutput(flush_interval=60)
+
+    with buffer.capture(output):
+        _printing_func(100)
+
+    assert len(updates) == 1
+
+
+def test_buffered_output_writes_full_log_to_file(tmp_path):
+    log_file = tmp_path / 'reduction.log'
+    buffer = BufferedOutput(max_lines=1, log_file=str(log_file))
+
+    with buffer.capture(ipywidgets.Output()):
+        _printing_func(5)
+
+    assert log_file.read_text().splitlines()[:5] == [f'line {i}' for i in range(5)]
+
+
+def test_overlapping_captures_restore_streams():
+    stdout = sys.stdout
+    first, second = BufferedOutput(), BufferedOutput()
+    first_started, second_started = threading.Event(), threading.Event()
+    first_done = threading.Event()
+
+    def run_first():
+        with first.capture(ipywidgets.Output()):
+            first_started.set()
+            second_started.wait()
+            print('first')
+        first_done.set()
+
+    def run_second():
+        first_started.wait()
+        with second.capture(ipywidgets.Output()):
+            second_started.set()
+            first_done.wait()
+            print('second')
+
+    threads = [threading.Thread(target=run_first), threading.Thread(target=run_second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert first.text == 'first\n'
+    assert second.text == 'second\n'
+    assert sys.stdout is stdout
+
+
+def test_captured_records_are_not_emitted_by_other_handlers():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    logging.getLogger().addHandler(handler)
+    buffer = BufferedOutput()
+    try:
+        with buffer.capture(ipywidgets.Output()):
+            _printing_func(0)
+        logging.getLogger('reduction').warning('after')
+    finally:
+        logging.getLogger().removeHandler(handler)
+
+    assert buffer.text == 'WARNING:reduction:done\n'
+    assert stream.getvalue() == 'after\n'
+    assert handler.filters == []
+
+
+def test_overlapping_captures_of_one_buffer_keep_their_own_lines():
+    buffer = BufferedOutput(flush_interval=60)
+    first_output, second_output = ipywidgets.Output(), ipywidgets.Output()
+    first_done = threading.Event()
+    second_started = threading.Event()
+
+    def run_first():
+        with buffer.capture(first_output):
+            second_started.wait()
+            print('first')
+        first_done.set()
+
+    def run_second():
+        with buffer.capture(second_output):
+            second_started.set()
+            first_done.wait()
+            print('second')
+
+    threads = [threading.Thread(target=run_first), threading.Thread(target=run_second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert first_output.outputs[0]['text'] == 'first\n'
+    assert second_output.outputs[0]['text'] == 'second\n'
+
+
+def test_buffered_output_shows_trailing_lines_while_quiet():
+    output = ipywidgets.Output()
+    buffer = BufferedOutput(flush_interval=0.05)
+
+    with buffer.capture(output):
+        print('first')
+        print('last')
+        time.sleep(0.5)
+        shown = output.outputs[0]['text']
+
+    assert shown == 'first\nlast\n'
+
+
+def test_flushes_from_worker_threads_are_applied_on_kernel_loop():
+    output = ipywidgets.Output()
+    updated_on = []
+    output.observe(lambda change: updated_on.append(threading.current_thread()),
+                   names='outputs')
+
+    def worker(buffer):
+        with buffer.capture(output):
+            print('line')
+
+    async def run():
+        buffer = BufferedOutput(flush_interval=60)
+        thread = threading.Thread(target=worker, args=(buffer, ))
+        thread.start()
+        thread.join()
+        assert updated_on == []
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+
+    assert updated_on == [threading.main_thread()]
+    assert output.outputs[0]['text'] == 'line\n'
@@ -0,0 +1,170 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.chunked import Chunking, HDF5Writer
+from scippwidgets.executors import InProcessExecutor, ThreadPoolExecutor
+from scippwidgets.inputs import Input
+from scippwidgets.widgets import ProcessWidget
+import numpy as np
+import pytest
+
+sc = pytest.importorskip('scipp')
+
+
+def _data():
+    return sc.DataArray(sc.array(dims=['x', 'y'],
+                                 values=np.arange(20.0).reshape(10, 2),
+                                 unit='m'),
+                        coords={'x': sc.arange('x', 10.0)})
+
+
+def _double(data):
+    return data * 2
+
+
+def test_chunked_run_concatenates_results():
+    chunking = Chunking('data', 'x', chunk_size=3)
+    sizes = []
+
+    def func(data):
+        sizes.append(data.sizes['x'])
+        return data * 2
+
+    result = chunking.run(func, {'data': _data()}, InProcessExecutor())
+
+    assert sizes == [3, 3, 3, 1]
+    assert sc.identical(result, _data() * 2)
+
+
+def test_chunked_run_reduces_incrementally_across_workers():
+    executor = ThreadPoolExecutor(max_workers=2)
+    chunking = Chunking('data', 'x', chunk_size=4, combine=lambda a, b: a + b)
+
+    result = chunking.run(lambda data: data.data.sum('x'), {'data': _data()}, executor)
+
+    assert sc.identical(result, _data().data.sum('x'))
+    executor.shutdown()
+
+
+def test_chunked_run_writes_results_to_hdf5(tmp_path):
+    pytest.importorskip('h5py')
+    writer = HDF5Writer(str(tmp_path / 'result.h5'))
+    chunking = Chunking('data', 'x', chunk_size=4, writer=writer)
+
+    result = chunking.run(_double, {'data': _data()}, InProcessExecutor())
+
+    assert result.dims == ('x', 'y')
+    assert np.array_equal(result['x', 2:5].values, (_data() * 2)['x', 2:5].values)
+
+
+def test_hdf5_writer_keeps_coords_and_masks(tmp_path):
+    pytest.importorskip('h5py')
+    data = _data()
+    data.coords['edges'] = sc.arange('x', 11.0, unit='s')
+    data.coords['y'] = sc.arange('y', 2.0)
+    data.masks['bad'] = data.coords['x'] > sc.scalar(6.0)
+    writer = HDF5Writer(str(tmp_path / 'result.h5'))
+    chunking = Chunking('data', 'x', chunk_size=3, writer=writer)
+
+    result = chunking.run(_double, {'data': data}, InProcessExecutor())
+
+    assert sc.identical(result.load(), data * 2)
+    assert sc.identical(result['x', 2:5], (data * 2)['x', 2:5])
+
+
+def test_chunked_run_closes_file_after_failing_chunk(tmp_path):
+    pytest.importorskip('h5py')
+    writer = HDF5Writer(str(tmp_path / 'result.h5'))
+    chunking = Chunking('data', 'x', chunk_size=4, writer=writer)
+
+    def fail(data):
+        raise RuntimeError('chunk failed')
+
+    with pytest.raises(RuntimeError):
+        chunking.run(fail, {'data': _data()}, InProcessExecutor())
+    result = chunking.run(_double, {'data': _data()}, InProcessExecutor())
+
+    assert result.sizes == {'x': 10, 'y': 2}
+
+
+def test_chunking_rejects_non_positive_chunk_size():
+    with pytest.raises(ValueError):
+        Chunking('data', 'x', chunk_size=0)
+
+
+def test_chunked_run_rejects_empty_dimension():
+    chunking = Chunking('data', 'x', chunk_size=4)
+
+    with pytest.raises(ValueError):
+        chunking.run(_double, {'data': _data()['x', 0:0]}, InProcessExecutor())
+
+
+def test_chunked_run_rejects_unknown_dimension():
+    chunking = Chunking('data', 'z', chunk_size=4)
+
+    with pytest.raises(ValueError):
+        chunking.run(_double, {'data': _data()}, InProcessExecutor())
+
+
+def test_process_widget_runs_chunked(monkeypatch):
+    monkeypatch.setattr('scippwidgets.widgets.display', lambda input: None)
+    scope = {'input': _data()}
+    input = Input('data')
+    input.scope = scope
+    widget = ProcessWidget(_double, [input],
+                           chunking=Chunking('data', 'x', chunk_size=3))
+    widget.scope = scope
+    widget.output.value = 'doubled'
+    input.widget.value = 'input'
+
+    widget._on_button_clicked(0)
+
+    assert sc.identical(scope['doubled'], _data() * 2)
+
+
+def test_hdf5_writer_keeps_variances(tmp_path):
+    pytest.importorskip('h5py')
+    data = _data()
+    data.variances = np.ones((10, 2))
+    writer = HDF5Writer(str(tmp_path / 'result.h5'))
+    chunking = Chunking('data', 'x', chunk_size=3, writer=writer)
+
+    result = chunking.run(_double, {'data': data}, InProcessExecutor())
+
+    assert sc.identical(result.load(), data * 2)
+
+
+def test_hdf5_writer_rejects_results_reduced_over_dimension(tmp_path):
+    pytest.importorskip('h5py')
+    writer = HDF5Writer(str(tmp_path / 'result.h5'))
+    chunking = Chunking('data', 'x', chunk_size=3, writer=writer)
+
+    with pytest.raises(ValueError):
+        chunking.run(lambda data: data.sum('x'), {'data': _data()},
+                     InProcessExecutor())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_hdf5_writer_sessions_do_not_interfere(tmp_path):
+    pytest.importorskip('h5py')
+    writer = HDF5Writer(str(tmp_path / 'result.h5'))
+    stale = writer.start('x')
+    stale.write(_data()['x', 0:5])
+    current = writer.start('x')
+    current.write(_data() * 2)
+    stale.write(_data()['x', 5:10])
+
+    result = current.finish()
+    with pytest.raises(RuntimeError):
+        stale.finish()
+    stale.close()
+
+    assert sc.identical(result.load(), _data() * 2)
+    assert [path.name for path in tmp_path.iterdir()] == ['result.h5']
+
+
+def test_chunking_rejects_invalid_combine():
+    with pytest.raises(ValueError):
+        Chunking('data', 'x', chunk_size=3, combine='sum')
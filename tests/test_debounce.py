@@ -0,0 +1,47 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.debounce import Debouncer
+import asyncio
+
+
+def test_debouncer_calls_immediately_outside_event_loop():
+    calls = []
+    debouncer = Debouncer(calls.append, delay=10)
+
+    debouncer(1)
+    debouncer(2)
+
+    assert calls == [1, 2]
+
+
+def test_debouncer_coalesces_calls_in_event_loop():
+    calls = []
+    debouncer = Debouncer(calls.append, delay=0.01)
+
+    async def trigger():
+        for value in range(5):
+            debouncer(value)
+        assert debouncer.pending
+        await asyncio.sleep(0.05)
+
+    asyncio.run(trigger())
+
+    assert calls == [4]
+    assert not debouncer.pending
+
+
+def test_cancelled_debouncer_does_not_call():
+    calls = []
+    debouncer = Debouncer(calls.append, delay=0.01)
+
+    async def trigger():
+        debouncer(1)
+        debouncer.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(trigger())
+
+    assert calls == []
@@ -0,0 +1,82 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.capture import BufferedOutput
+from scippwidgets.executors import (InProcessExecutor, ThreadPoolExecutor,
+                                    ProcessPoolExecutor, DaskExecutor)
+from scippwidgets.widgets import ProcessWidget
+import operator
+import pytest
+import threading
+
+
+@pytest.mark.parametrize('executor_type',
+                         [InProcessExecutor, ThreadPoolExecutor, ProcessPoolExecutor])
+def test_executor_runs_function(executor_type):
+    executor = executor_type()
+
+    assert executor.run(operator.add, 1, 2) == 3
+    assert executor.submit(operator.mul, 2, 3).result() == 6
+    executor.shutdown()
+
+
+def test_in_process_executor_stores_exception_in_future():
+    future = InProcessExecutor().submit(operator.truediv, 1, 0)
+
+    with pytest.raises(ZeroDivisionError):
+        future.result()
+
+
+def test_process_widget_calls_function_through_executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    scope = {}
+    widget = ProcessWidget(lambda: threading.current_thread(), [], executor=executor)
+    widget.scope = scope
+    widget.output.value = 'thread'
+
+    widget._on_button_clicked(0)
+
+    assert scope['thread'] is not threading.current_thread()
+    executor.shutdown()
+
+
+def test_process_widget_captures_output_on_executor_threads():
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def chatty():
+        print('from worker')
+        return threading.current_thread()
+
+    widget = ProcessWidget(chatty, [],
+                           executor=executor,
+                           output_capture=BufferedOutput(flush_interval=60))
+    widget.scope = {}
+    widget.output.value = 'thread'
+
+    widget._on_button_clicked(0)
+
+    assert widget.scope['thread'] is not threading.current_thread()
+    assert widget.output_area.outputs[0]['text'] == 'from worker\n'
+    executor.shutdown()
+
+
+def test_output_capture_with_process_pool_warns():
+    executor = ProcessPoolExecutor(max_workers=1)
+
+    with pytest.warns(UserWarning, match='captured'):
+        ProcessWidget(print, [], executor=executor, output_capture=BufferedOutput())
+    executor.shutdown()
+
+
+def test_dask_executor_defers_gathering():
+    distributed = pytest.importorskip('distributed')
+    with distributed.LocalCluster(n_workers=1, processes=False) as cluster:
+        with distributed.Client(cluster) as client:
+            executor = DaskExecutor(client, gather=False)
+
+            future = executor.run(operator.add, 1, 2)
+
+            assert isinstance(future, distributed.Future)
+            assert future.result() == 3
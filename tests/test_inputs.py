@@ -3,7 +3,7 @@
 # @file
 # @author Matthew Andrew
 
-from scippwidgets.inputs import (Input, TextInput, ScippInputWithDim)
+from scippwidgets.inputs import (Input, TextInput, ScippInputWithDim, FileInput)
 import scipp as sc
 import numpy as np
 import pytest
@@ -88,3 +88,145 @@ def test_ScippInputWithDim_throws_for_non_scipp_object():
 
     with pytest.raises(ValueError):
         input.function_arguments
+
+
+def test_FileInput_shows_preview_of_selected_file(tmp_path):
+    pytest.importorskip('ipyfilechooser')
+    filename = tmp_path / 'data.txt'
+    filename.write_text('file contents')
+    input = FileInput('filename', default_directory=str(tmp_path), preview=True)
+    selected = []
+    input.widget.register_callback(selected.append)
+
+    input._chooser.reset(path=str(tmp_path), filename='data.txt')
+    input._chooser._show_dialog()
+    input._chooser._on_select_click(None)
+
+    assert 'file contents' in input.widget.preview_area.value
+    assert selected == [input._chooser]
+    assert input.function_arguments == {'filename': str(filename)}
+
+
+def test_FileInput_marks_invalid_selection(tmp_path):
+    pytest.importorskip('ipyfilechooser')
+    (tmp_path / 'data.txt').write_text('file contents')
+    calls = []
+
+    def validator(path):
+        calls.append(path)
+        raise ValueError('Wrong file type')
+
+    input = FileInput('filename', default_directory=str(tmp_path), validator=validator)
+    input.widget
+    input._chooser.reset(path=str(tmp_path), filename='data.txt')
+    input._chooser._show_dialog()
+    input._chooser._on_select_click(None)
+
+    assert input._chooser.layout.border == '1px solid red'
+    assert len(calls) == 1
+
+
+def test_TextInput_reuses_value_validated_on_change():
+    calls = []
+
+    def validator(value):
+        calls.append(value)
+        return value
+
+    input = TextInput('arg', validator=validator)
+    input.widget.value = 'text'
+
+    assert input.function_arguments == {'arg': 'text'}
+    assert calls == ['text']
+
+
+def test_Input_with_trusted_cache_reuses_value_until_invalidated():
+    calls = []
+
+    def validator(value):
+        calls.append(value)
+        return value
+
+    input = Input(function_arg_name='arg', validator=validator, trust_cache=True)
+    input.scope = {'test_obj': [1, 2]}
+    input.widget.value = 'test_obj'
+    input.function_arguments
+
+    assert calls == [[1, 2]]
+
+    input.invalidate()
+    input.function_arguments
+
+    assert calls == [[1, 2], [1, 2]]
+
+
+def test_Input_validates_on_change_and_again_when_used():
+    calls = []
+
+    def validator(value):
+        calls.append(value)
+        return value
+
+    input = Input(function_arg_name='arg', validator=validator)
+    input.scope = {'test_obj': [1, 2]}
+    input.widget.value = 'test_obj'
+
+    assert calls == [[1, 2]]
+    assert input.function_arguments == {'arg': [1, 2]}
+    assert calls == [[1, 2], [1, 2]]
+
+
+def test_Input_reflects_in_place_changes_of_scope_objects():
+    input = Input(function_arg_name='arg', validator=lambda value: value * 2)
+    input.scope = {'x': np.array([1, 2])}
+    input.widget.value = 'x'
+
+    input.scope['x'][0] = 100
+
+    assert input.function_arguments['arg'].tolist() == [200, 4]
+
+
+def test_Input_revalidates_when_scope_object_changes():
+    input = Input(function_arg_name='arg')
+    input.scope = {'test_obj': [1, 2]}
+    input.widget.value = 'test_obj'
+
+    input.scope['test_obj'] = [3, 4]
+
+    assert input.function_arguments == {'arg': [3, 4]}
+
+
+def test_Input_revalidates_after_in_place_fix_of_invalid_object():
+    def validator(value):
+        if 'x' not in value:
+            raise ValueError('No coord x')
+        return value
+
+    input = Input(function_arg_name='arg', validator=validator)
+    input.scope = {'data': {}}
+    input.widget.value = 'data'
+
+    assert input.widget.layout.border == '1px solid red'
+
+    input.scope['data']['x'] = 1
+
+    assert input.function_arguments == {'arg': {'x': 1}}
+
+
+def test_Input_marks_invalid_value():
+    input = Input(function_arg_name='arg')
+    input.scope = {}
+    input.widget.value = 'missing'
+
+    assert input.widget.layout.border == '1px solid red'
+    with pytest.raises(ValueError):
+        input.function_arguments
+
+    input.scope['missing'] = 1
+
+    assert input.function_arguments == {'arg': 1}
+
+    input.widget.value = ''
+    input.widget.value = 'missing'
+
+    assert input.widget.layout.border == ''
@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip('h5py')
+sc = pytest.importorskip('scipp')
+
+from scippwidgets.inputs import ScippInputWithDim  # noqa: E402
+from scippwidgets.lazy import open_lazy  # noqa: E402
+from scippwidgets.testing import synthetic_scope  # noqa: E402
+from scippwidgets.validators import ScippObjectValidator  # noqa: E402
+
+
+@pytest.fixture
+def nexus_file(tmp_path):
+    filename = str(tmp_path / 'data.nxs')
+    with h5py.File(filename, 'w') as f:
+        entry = f.create_group('entry')
+        data = entry.create_group('data')
+        data.attrs['signal'] = 'counts'
+        data.attrs['axes'] = ['x', 'y']
+        counts = data.create_dataset('counts', data=np.arange(20.0).reshape(5, 4))
+        counts.attrs['units'] = 'counts'
+        x = data.create_dataset('x', data=np.arange(6.0))
+        x.attrs['units'] = 'm'
+    return filename
+
+
+def test_open_lazy_reads_only_metadata(nexus_file):
+    proxy = open_lazy(nexus_file)
+
+    assert proxy.path == '/entry/data/counts'
+    assert proxy.dims == ('x', 'y')
+    assert proxy.shape == (5, 4)
+    assert proxy.unit == 'counts'
+    assert list(proxy.coord_info) == ['x']
+    assert proxy._data is None
+
+
+def test_lazy_slice_reads_data_and_bin_edges(nexus_file):
+    proxy = open_lazy(nexus_file)
+    proxy.chunk_size = 4
+
+    sliced = proxy['x', 1:3]
+
+    assert sc.identical(sliced.data,
+                        sc.array(dims=['x', 'y'],
+                                 values=np.arange(4.0, 12.0).reshape(2, 4),
+                                 unit='counts'))
+    assert np.array_equal(sliced.coords['x'].values, [1.0, 2.0, 3.0])
+    assert proxy._data is None
+
+
+def test_lazy_proxy_loads_on_first_use(nexus_file):
+    proxy = open_lazy(nexus_file)
+
+    assert proxy.values.sum() == np.arange(20.0).sum()
+    assert proxy._data is not None
+
+
+def test_lazy_proxy_supports_operators_and_real_coords(nexus_file):
+    proxy = open_lazy(nexus_file)
+    data = proxy.load()
+
+    assert sc.identical(proxy * 2, data * 2)
+    assert sc.identical(2 * proxy, 2 * data)
+    assert sc.identical(proxy - proxy, data - data)
+    assert sc.identical(proxy > data, data > data)
+    assert sc.identical(-proxy, -data)
+    assert sc.identical(proxy.coords['x'], data.coords['x'])
+
+
+def test_scipp_object_validator_accepts_lazy_proxy_without_loading(nexus_file):
+    proxy = open_lazy(nexus_file)
+
+    assert ScippObjectValidator()(proxy) is proxy
+    assert proxy._data is None
+
+
+def test_scipp_input_with_dim_lists_dims_of_lazy_proxy_without_loading(nexus_file):
+    proxy = open_lazy(nexus_file)
+    with synthetic_scope({'proxy': proxy}):
+        input = ScippInputWithDim()
+    input.widget.children[0].value = 'proxy'
+    input.widget.children[1].value = 'y'
+
+    assert input._dimension_input.options == ('x', 'y')
+    assert input.function_arguments == {'x': proxy, 'dim': 'y'}
+    assert proxy._data is None
@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.preview import preview_file, preview_html
+import numpy as np
+import os
+import pytest
+
+
+def test_preview_lists_hdf5_structure(tmp_path):
+    h5py = pytest.importorskip('h5py')
+    filename = str(tmp_path / 'data.h5')
+    with h5py.File(filename, 'w') as f:
+        group = f.create_group('entry')
+        group.attrs['NX_class'] = 'NXentry'
+        group.create_dataset('counts', data=np.zeros((3, 4), dtype=np.int32))
+
+    preview = preview_file(filename)
+
+    assert preview.splitlines() == [
+        'entry/ [NX_class=NXentry]', '  counts (3, 4) int32'
+    ]
+
+
+def test_preview_truncates_hdf5_listing(tmp_path):
+    h5py = pytest.importorskip('h5py')
+    filename = str(tmp_path / 'data.h5')
+    with h5py.File(filename, 'w') as f:
+        for i in range(10):
+            f.create_group(f'group_{i}')
+
+    preview = preview_file(filename, max_items=3)
+
+    assert len(preview.splitlines()) == 4
+    assert preview.endswith('(preview truncated)')
+
+
+def test_preview_shows_head_of_other_files(tmp_path):
+    filename = tmp_path / 'data.txt'
+    filename.write_text('a' * 100)
+
+    preview = preview_file(str(filename), max_bytes=10)
+
+    assert preview == 'a' * 10 + '\n... (preview truncated)'
+
+
+def test_preview_is_refreshed_when_file_changes(tmp_path):
+    filename = tmp_path / 'data.txt'
+    filename.write_text('old')
+    assert preview_file(str(filename)) == 'old'
+
+    filename.write_text('new')
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert preview_file(str(filename)) == 'new'
+
+
+def test_preview_html_reports_missing_file():
+    assert 'No preview available' in preview_html('non_existent_file.txt')
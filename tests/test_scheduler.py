@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.scheduler import JobScheduler, Priority
+import threading
+
+
+def _blocking_job(release, started, name):
+    def job():
+        started.append(name)
+        release.wait(5)
+        return name
+
+    return job
+
+
+def test_scheduler_limits_concurrency_and_starts_by_priority():
+    scheduler = JobScheduler(max_concurrency=1)
+    release = threading.Event()
+    started = []
+
+    first = scheduler.submit(_blocking_job(release, started, 'first'))
+    batch = scheduler.submit(_blocking_job(release, started, 'batch'),
+                             priority=Priority.BATCH)
+    interactive = scheduler.submit(_blocking_job(release, started, 'interactive'),
+                                   priority=Priority.INTERACTIVE)
+
+    assert [job.future for job in scheduler.running] == [first]
+    assert [job.future for job in scheduler.queued] == [interactive, batch]
+
+    release.set()
+    assert batch.result(5) == 'batch'
+    assert started == ['first', 'interactive', 'batch']
+
+
+def test_scheduler_holds_jobs_exceeding_memory_limit():
+    scheduler = JobScheduler(max_concurrency=4, memory_limit=100)
+    release = threading.Event()
+    started = []
+
+    scheduler.submit(_blocking_job(release, started, 'small'), memory=60)
+    large = scheduler.submit(_blocking_job(release, started, 'large'), memory=60)
+
+    assert len(scheduler.running) == 1
+    assert not large.running()
+
+    release.set()
+    assert large.result(5) == 'large'
+
+
+def test_cancelled_job_is_never_started():
+    scheduler = JobScheduler(max_concurrency=1)
+    release = threading.Event()
+    started = []
+
+    first = scheduler.submit(_blocking_job(release, started, 'first'))
+    cancelled = scheduler.submit(_blocking_job(release, started, 'cancelled'))
+    cancelled.cancel()
+    release.set()
+    first.result(5)
+
+    assert scheduler.queued == []
+    assert started == ['first']
+
+
+def test_status_widget_lists_jobs():
+    scheduler = JobScheduler(max_concurrency=1)
+    release = threading.Event()
+    status = scheduler.status_widget()
+
+    future = scheduler.submit(_blocking_job(release, [], 'job'), name='my_job')
+
+    assert 'my_job' in status.value
+    release.set()
+    future.result(5)
+
+
+def test_status_widget_escapes_job_names_and_drops_closed_panels():
+    scheduler = JobScheduler(max_concurrency=1)
+    release = threading.Event()
+    closed = scheduler.status_widget()
+    status = scheduler.status_widget()
+    closed.close()
+
+    future = scheduler.submit(_blocking_job(release, [], 'job'), name='<lambda>')
+
+    assert '&lt;lambda&gt;' in status.value
+    assert scheduler._status_widgets == [status]
+    release.set()
+    future.result(5)
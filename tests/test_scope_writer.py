@@ -0,0 +1,109 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.scope_writer import ScopeWriter, get_scope_writer
+import asyncio
+import gc
+import pytest
+import threading
+import weakref
+
+
+def test_writer_writes_batch_and_allows_rewrite_by_same_owner():
+    scope = {}
+    writer = ScopeWriter(scope)
+
+    writer.write({'a': 1, 'b': 2}, owner='widget')
+    writer.write({'a': 3}, owner='widget')
+
+    assert scope == {'a': 3, 'b': 2}
+    assert writer.collisions == []
+
+
+def test_writer_warns_on_collision_with_other_owner():
+    scope = {'a': 0}
+    writer = ScopeWriter(scope)
+
+    with pytest.warns(UserWarning, match='a'):
+        writer.write({'a': 1}, owner='widget')
+
+    assert writer.collisions == [('a', None, 'widget')]
+
+
+def test_writer_refuses_whole_batch_on_collision_error():
+    scope = {'a': 0}
+    writer = ScopeWriter(scope, on_collision='error')
+
+    with pytest.raises(ValueError):
+        writer.write({'b': 1, 'a': 1}, owner='widget')
+
+    assert scope == {'a': 0}
+
+
+def test_writes_from_worker_threads_are_applied_on_kernel_loop():
+    scope = {}
+    applied_on = []
+
+    async def run():
+        writer = ScopeWriter(scope)
+        future = None
+
+        def worker():
+            nonlocal future
+            future = writer.write({'result': threading.current_thread()})
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert 'result' not in scope
+        await asyncio.sleep(0.01)
+        applied_on.append(future.done())
+
+    asyncio.run(run())
+
+    assert applied_on == [True]
+    assert scope['result'] is not threading.current_thread()
+
+
+def test_get_scope_writer_is_shared_per_scope():
+    scope = {}
+
+    assert get_scope_writer(scope) is get_scope_writer(scope)
+    assert get_scope_writer(scope) is not get_scope_writer({})
+
+
+def test_write_can_override_collision_policy():
+    scope = {'a': 0}
+    writer = ScopeWriter(scope, on_collision='error')
+
+    writer.write({'a': 1}, owner='widget', on_collision='ignore')
+
+    assert scope == {'a': 1}
+
+
+class _Scope(dict):
+    pass
+
+
+def test_writers_do_not_keep_scopes_alive():
+    scope = _Scope()
+    get_scope_writer(scope)
+    scope_ref = weakref.ref(scope)
+    del scope
+    gc.collect()
+
+    assert scope_ref() is None
+
+
+def test_writer_treats_rebound_names_as_foreign():
+    scope = {}
+    writer = ScopeWriter(scope)
+    writer.write({'out': [1]}, owner='widget')
+    scope['out'] = [2]
+
+    with pytest.warns(UserWarning, match='out'):
+        writer.write({'out': [3]}, owner='widget')
+
+    assert writer.collisions == [('out', None, 'widget')]
@@ -0,0 +1,128 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.inputs import TextInput
+from scippwidgets.scope_writer import get_scope_writer
+from scippwidgets.snapshot import save_snapshot, load_snapshot, snapshot, restore
+from scippwidgets.widgets import ProcessWidget, registered_widgets
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_display(monkeypatch):
+    monkeypatch.setattr("scippwidgets.widgets.display", lambda input: None)
+    yield
+    for widget in registered_widgets().values():
+        widget.close()
+
+
+def _make_widget(scope, calls):
+    def concat(first, second):
+        calls.append((first, second))
+        return first + second
+
+    widget = ProcessWidget(concat, [TextInput('first'), TextInput('second')],
+                           name='concat')
+    widget.scope = scope
+    return widget
+
+
+def test_snapshot_records_inputs_and_output_name():
+    scope = {}
+    widget = _make_widget(scope, [])
+    widget.inputs[0].widget.value = 'a'
+    widget.inputs[1].widget.value = 'b'
+    widget.output.value = 'ab'
+    widget._on_button_clicked(0)
+
+    state = snapshot([widget])
+
+    assert state['widgets']['concat'] == {
+        'inputs': ['a', 'b'],
+        'target': 'ab',
+        'output': 'ab'
+    }
+
+
+def test_restore_repopulates_scope_without_rerunning(tmp_path):
+    scope = {}
+    widget = _make_widget(scope, [])
+    widget.inputs[0].widget.value = 'a'
+    widget.inputs[1].widget.value = 'b'
+    widget.output.value = 'ab'
+    widget._on_button_clicked(0)
+    filename = str(tmp_path / 'snapshot.json')
+    save_snapshot(filename, widgets=[widget], results_dir=str(tmp_path))
+
+    widget.close()
+    new_scope = {}
+    calls = []
+    new_widget = _make_widget(new_scope, calls)
+    restored = load_snapshot(filename, widgets=[new_widget], results_dir=str(tmp_path))
+
+    assert restored == ['concat']
+    assert new_widget.inputs[0].widget.value == 'a'
+    assert new_widget.output.value == 'ab'
+    assert new_scope == {'ab': 'ab'}
+    assert calls == []
+
+
+def test_restore_rejects_unknown_version():
+    with pytest.raises(ValueError):
+        restore({'version': 0, 'widgets': {}}, widgets=[])
+
+
+def test_snapshot_builds_lazy_widget():
+    widget = ProcessWidget(lambda: None, [TextInput('first')], name='lazy', lazy=True)
+
+    state = snapshot([widget])
+
+    assert state['widgets']['lazy'] == {'inputs': [''], 'target': None, 'output': ''}
+
+
+def test_widget_with_same_name_replaces_previous_one():
+    first = _make_widget({}, [])
+    with pytest.warns(UserWarning, match='concat'):
+        second = _make_widget({}, [])
+
+    assert registered_widgets()['concat'] is second
+    assert first.comm is None
+
+
+def test_snapshot_refuses_unnamed_widgets():
+    widget = ProcessWidget(lambda: None, [])
+
+    with pytest.raises(ValueError):
+        snapshot([widget])
+    assert widget.name not in snapshot()['widgets']
+
+
+def test_restore_reports_unmatched_widgets():
+    widget = _make_widget({}, [])
+    state = snapshot([widget])
+    state['widgets']['renamed'] = state['widgets']['concat']
+
+    with pytest.warns(UserWarning, match='renamed'):
+        assert restore(state, widgets=[widget]) == ['concat']
+    with pytest.raises(ValueError):
+        restore(state, widgets=[widget], on_missing='error')
+
+
+def test_running_restored_widget_is_not_a_collision(tmp_path):
+    widget = _make_widget({}, [])
+    widget.inputs[0].widget.value = 'a'
+    widget.inputs[1].widget.value = 'b'
+    widget.output.value = 'ab'
+    widget._on_button_clicked(0)
+    state = snapshot([widget], results_dir=str(tmp_path))
+    widget.close()
+
+    scope = {}
+    new_widget = _make_widget(scope, [])
+    new_widget.on_collision = 'error'
+    restore(state, widgets=[new_widget], results_dir=str(tmp_path))
+    new_widget._on_button_clicked(0)
+
+    assert get_scope_writer(scope).collisions == []
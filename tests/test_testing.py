@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2021 Scipp contributors (https://github.com/scipp)
+# @file
+# @author Matthew Andrew
+
+from scippwidgets.inputs import Input, TextInput, get_notebook_global_scope
+from scippwidgets.testing import headless, synthetic_scope, WidgetDriver
+from scippwidgets.widgets import DisplayWidget, ProcessWidget
+import asyncio
+import pytest
+
+comm = pytest.importorskip('comm')
+
+
+def test_synthetic_scope_is_used_as_notebook_scope():
+    with synthetic_scope({'data': [1, 2]}) as scope:
+        input = Input('arg')
+        assert get_notebook_global_scope() is scope
+
+    assert input.scope is scope
+    assert get_notebook_global_scope() is not scope
+
+
+def test_headless_widgets_use_dummy_comms():
+    with headless():
+        widget = DisplayWidget(lambda: 'result', [])
+
+    assert isinstance(widget.comm, comm.DummyComm)
+    assert isinstance(widget.button.comm, comm.DummyComm)
+
+
+def test_driver_runs_process_widget_many_times():
+    with headless({'offset': 10}) as scope:
+        widget = ProcessWidget(lambda value, offset: int(value) + offset,
+                               [TextInput('value'), Input('offset')])
+        driver = WidgetDriver(widget)
+
+        driver.set_inputs(None, 'offset', output='total')
+        elapsed = driver.run_many((str(i), ) for i in range(1000))
+
+    assert elapsed > 0
+    assert len(driver.results) == 1000
+    assert scope['total'] == 1009
+
+
+def test_driver_waits_for_background_runs():
+    with headless() as scope:
+        widget = ProcessWidget(lambda value: value * 2, [TextInput('value')],
+                               background=True)
+        driver = WidgetDriver(widget)
+
+        result = driver.run('ab', output='doubled')
+
+    assert result == 'abab'
+    assert scope['doubled'] == 'abab'
+
+
+def test_driver_waits_for_background_runs_inside_event_loop():
+    async def run():
+        with headless() as scope:
+            widget = ProcessWidget(lambda value: value * 2, [TextInput('value')],
+                                   background=True)
+            driver = WidgetDriver(widget)
+            driver.set_inputs('ab', output='doubled')
+            driver.click(timeout=2)
+            await asyncio.sleep(0.01)
+        return driver.results, scope
+
+    results, scope = asyncio.run(run())
+
+    assert results == ['abab']
+    assert scope['doubled'] == 'abab'
@@ -3,9 +3,14 @@
 # @file
 # @author Matthew Andrew
 
-from scippwidgets.widgets import (DisplayWidget, ProcessWidget)
+from scippwidgets.widgets import (DisplayWidget, PlotWidget, ProcessWidget,
+                                  build_on_select)
 from scippwidgets.inputs import TextInput
+from scippwidgets.testing import synthetic_scope
+import ipywidgets
 import pytest
+import time
+import warnings
 
 
 @pytest.fixture(autouse=True)
@@ -85,3 +90,174 @@ def test_default_func_args_used_if_they_exist():
     widget._on_button_clicked(0)
 
     assert scope['obj_name'] == "input_1 input_2"
+
+
+class _RecordingDisplayWidget(DisplayWidget):
+    def __init__(self, wrapped_func, inputs):
+        super().__init__(wrapped_func, inputs, update_in_place=True)
+        self.created = []
+        self.updated = []
+
+    def _make_figure(self, result):
+        self.created.append(result)
+        return f'figure {len(self.created)}'
+
+    def _update_figure(self, result):
+        self.updated.append(result)
+
+
+def test_display_widget_updates_figure_in_place_for_same_structure():
+    results = iter([[1, 2], [3, 4]])
+    widget = _RecordingDisplayWidget(lambda: next(results), [])
+
+    widget._on_button_clicked(0)
+    widget._on_button_clicked(0)
+
+    assert widget.created == [[1, 2]]
+    assert widget.updated == [[3, 4]]
+    assert widget._figure == 'figure 1'
+
+
+def test_display_widget_recreates_figure_for_different_structure():
+    results = iter([[1, 2], 'text'])
+    widget = _RecordingDisplayWidget(lambda: next(results), [])
+
+    widget._on_button_clicked(0)
+    widget._on_button_clicked(0)
+
+    assert widget.created == [[1, 2], 'text']
+    assert widget.updated == []
+    assert widget._figure == 'figure 2'
+
+
+def test_plot_widget_updates_plopp_node_in_place():
+    pytest.importorskip('plopp')
+    import scipp as sc
+    first = sc.DataArray(sc.array(dims=['x'], values=[1.0, 2.0]),
+                         coords={'x': sc.array(dims=['x'], values=[0.0, 1.0])})
+    second = first * 2.0
+    with synthetic_scope({'first': first, 'second': second}):
+        widget = PlotWidget(update_in_place=True)
+        widget.inputs[0].widget.value = 'first'
+        widget._on_button_clicked(0)
+        node, figure = widget._node, widget._figure
+        shown = widget.figure_area.outputs
+
+        widget.inputs[0].widget.value = 'second'
+        widget._on_button_clicked(0)
+
+    assert widget._node is node
+    assert widget._figure is figure
+    assert sc.identical(node.request_data(), second)
+    assert len(widget.figure_area.outputs) == 1
+    assert widget.figure_area.outputs != shown
+
+
+def test_display_widget_closes_nested_models_of_replaced_figure():
+    figures = iter([ipywidgets.VBox([ipywidgets.Label('a')]), 'text'])
+    widget = DisplayWidget(lambda: next(figures), [], update_in_place=True)
+
+    widget._on_button_clicked(0)
+    label = widget._figure.children[0]
+    widget._on_button_clicked(0)
+
+    assert label.comm is None
+
+
+def test_lazy_widget_creates_children_on_build():
+    input = TextInput('arg')
+    widget = ProcessWidget(lambda arg: arg, [input], lazy=True)
+
+    assert widget.children == ()
+    assert input._widget is None
+
+    widget.build()
+
+    assert len(widget.children) == 2
+    assert widget.input_widgets == [input.widget]
+
+
+def test_build_on_select_builds_selected_tab_page():
+    first = DisplayWidget(lambda: 'first', [], lazy=True)
+    second = DisplayWidget(lambda: 'second', [], lazy=True)
+    tab = build_on_select(ipywidgets.Tab(children=[first, second]))
+    tab.selected_index = 0
+
+    assert first._built
+    assert not second._built
+
+    tab.selected_index = 1
+
+    assert second._built
+
+
+def test_auto_run_widget_runs_on_input_change():
+    scope = {}
+    input = TextInput('arg')
+    widget = ProcessWidget(lambda arg: f'{arg}!', [input], auto_run=True)
+    widget.scope = scope
+    widget.output.value = 'obj_name'
+
+    input.widget.value = 'first'
+    input.widget.value = 'second'
+
+    assert scope['obj_name'] == 'second!'
+
+
+def test_background_process_widget_writes_result_to_scope():
+    scope = {}
+    widget = ProcessWidget(lambda: 'func_return', [], background=True)
+    widget.scope = scope
+    widget.output.value = 'obj_name'
+
+    widget._on_button_clicked(0)
+    for _ in range(500):
+        if 'obj_name' in scope:
+            break
+        time.sleep(0.01)
+
+    assert scope['obj_name'] == 'func_return'
+
+
+def test_wait_returns_after_background_result_is_handled():
+    scope = {}
+    results = []
+    widget = ProcessWidget(lambda: 'func_return', [], background=True)
+    widget.scope = scope
+    widget.output.value = 'obj_name'
+    widget.on_result(results.append)
+
+    widget._on_button_clicked(0)
+    widget.wait(5)
+
+    assert results == ['func_return']
+    assert scope['obj_name'] == 'func_return'
+
+
+def test_process_widget_overwrites_existing_names_silently_by_default():
+    scope = {'data': 'original'}
+    widget = ProcessWidget(lambda: 'processed', [])
+    widget.scope = scope
+    widget.output.value = 'data'
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        widget._on_button_clicked(0)
+
+    assert scope['data'] == 'processed'
+
+
+def test_process_widget_can_refuse_to_overwrite_existing_names():
+    scope = {'data': 'original'}
+    widget = ProcessWidget(lambda: 'processed', [], on_collision='error')
+    widget.scope = scope
+    widget.output.value = 'data'
+
+    # Under IPython the output area shows the error rather than raising it
+    try:
+        widget._on_button_clicked(0)
+    except ValueError:
+        pass
+
+    assert scope['data'] == 'original'
+    assert widget._scope_writer.collisions == [('data', None, widget.name)]